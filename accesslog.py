@@ -0,0 +1,41 @@
+import atexit
+import logging
+import logging.handlers
+import queue
+import random
+import time
+
+access_logger = logging.getLogger("access")
+_sample_rate = 1.0
+_listener = None
+
+def setup(level=logging.WARNING, sample_rate=1.0):
+    # semua log dilewatkan ke antrian, penulisan ke stderr dilakukan thread QueueListener
+    global _listener, _sample_rate
+    _sample_rate = sample_rate
+    antrian = queue.SimpleQueue()
+    handler = logging.StreamHandler()
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s %(name)s %(message)s"))
+
+    root = logging.getLogger()
+    root.handlers[:] = [logging.handlers.QueueHandler(antrian)]
+    root.setLevel(level)
+    access_logger.setLevel(logging.INFO if sample_rate > 0 else logging.CRITICAL + 1)
+
+    if _listener is not None:
+        _listener.stop()
+    else:
+        atexit.register(lambda: _listener.stop())
+    _listener = logging.handlers.QueueListener(antrian, handler)
+    _listener.start()
+
+def log_access(request, kode, nbytes, latency=None):
+    # satu baris ringkas per request, bisa di-sampling agar murah saat beban tinggi
+    if not access_logger.isEnabledFor(logging.INFO):
+        return
+    if _sample_rate < 1.0 and random.random() >= _sample_rate:
+        return
+    if latency is None:
+        latency = time.perf_counter() - request.started
+    access_logger.info("method=%s path=%s cmd=%s player=%s status=%s bytes=%d ms=%.2f",
+                       request.method, request.path, request.command, request.player, kode, nbytes, latency * 1000)
@@ -1,9 +1,10 @@
 # client.py
 import pygame
 import sys
-import json
-import socket
+import queue
+import threading
 import time
+from unoclient import UnoClient, apply_delta
 
 # --- Inisialisasi dan Konfigurasi Pygame ---
 pygame.init()
@@ -19,9 +20,28 @@ CARD_FONT = pygame.font.Font(None, 32)
 INFO_FONT = pygame.font.Font(None, 28)
 MSG_FONT = pygame.font.Font(None, 24)
 CARD_WIDTH, CARD_HEIGHT, CARD_MARGIN = 80, 120, 10
+# area kartu di tangan (termasuk tombol panah), digambar ulang sendiri saat hover / scroll berubah
+HAND_AREA = pygame.Rect(0, SCREEN_HEIGHT - 175, SCREEN_WIDTH, CARD_HEIGHT + 10)
+LONG_POLL_TIMEOUT = 25
 
 # --- Fungsi Helper Visual ---
-def draw_card(screen, x, y, card_str, selected=False):
+# surface teks, kartu dan tombol dirender sekali lalu dipakai ulang di setiap frame
+SURFACE_CACHE_SIZE = 512
+_text_cache = {}
+_card_cache = {}
+_button_cache = {}
+
+def _cached(cache, key, make):
+    surf = cache.get(key)
+    if surf is None:
+        if len(cache) >= SURFACE_CACHE_SIZE: cache.clear()
+        surf = cache[key] = make()
+    return surf
+
+def render_text(text, font, color):
+    return _cached(_text_cache, (text, id(font), tuple(color)), lambda: font.render(text, True, color))
+
+def _make_card(card_str, selected, dimmed):
     parts = card_str.split(" ", 1)
     color_str, value_str = parts[0], parts[1]
     
@@ -30,19 +50,35 @@ def draw_card(screen, x, y, card_str, selected=False):
     elif value_str == "Wild Draw Four": display_text = "+4"
 
     card_color = COLOR_MAP.get(color_str.lower(), BLACK)
-    card_rect = pygame.Rect(x, y, CARD_WIDTH, CARD_HEIGHT)
-    pygame.draw.rect(screen, card_color, card_rect, border_radius=10)
-    if selected: pygame.draw.rect(screen, WHITE, card_rect, 4, border_radius=10)
-    text_surf = CARD_FONT.render(display_text, True, WHITE)
-    screen.blit(text_surf, text_surf.get_rect(center=card_rect.center))
+    surf = pygame.Surface((CARD_WIDTH, CARD_HEIGHT), pygame.SRCALPHA)
+    card_rect = surf.get_rect()
+    pygame.draw.rect(surf, card_color, card_rect, border_radius=10)
+    if selected: pygame.draw.rect(surf, WHITE, card_rect, 4, border_radius=10)
+    text_surf = render_text(display_text, CARD_FONT, WHITE)
+    surf.blit(text_surf, text_surf.get_rect(center=card_rect.center))
+    if dimmed:
+        # kartu yang tidak bisa dimainkan digelapkan
+        shade = pygame.Surface((CARD_WIDTH, CARD_HEIGHT), pygame.SRCALPHA)
+        shade.fill((0, 0, 0, 120))
+        surf.blit(shade, (0, 0))
+    return surf
+
+def draw_card(screen, x, y, card_str, selected=False, dimmed=False):
+    surf = _cached(_card_cache, (card_str, selected, dimmed), lambda: _make_card(card_str, selected, dimmed))
+    screen.blit(surf, (x, y))
 
 def draw_button(screen, text, rect, color, text_color, font=BUTTON_FONT):
-    pygame.draw.rect(screen, color, rect, border_radius=15)
-    text_surf = font.render(text, True, text_color)
-    screen.blit(text_surf, text_surf.get_rect(center=rect.center))
+    def make():
+        surf = pygame.Surface(rect.size, pygame.SRCALPHA)
+        pygame.draw.rect(surf, color, surf.get_rect(), border_radius=15)
+        text_surf = render_text(text, font, text_color)
+        surf.blit(text_surf, text_surf.get_rect(center=surf.get_rect().center))
+        return surf
+    key = (text, rect.size, tuple(color), tuple(text_color), id(font))
+    screen.blit(_cached(_button_cache, key, make), rect.topleft)
 
 def draw_text(screen, text, font, color, pos, align="center"):
-    text_surf = font.render(text, True, color)
+    text_surf = render_text(text, font, color)
     text_rect = text_surf.get_rect()
     if align == "center": text_rect.center = pos
     elif align == "topleft": text_rect.topleft = pos
@@ -100,109 +136,209 @@ def name_entry_scene(screen):
         clock.tick(30)
 
 # --- Kelas Utama Client & Game Loop ---
-class UnoClient:
-    def __init__(self, player_id):
-        self.player_id = player_id
-        self.server_address = ('localhost', 8889)
-
-    def send_command(self, command_body):
-        try:
-            request = f"POST /uno HTTP/1.0\r\n\r\n{command_body}"
-            with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
-                sock.settimeout(5.0)
-                sock.connect(self.server_address)
-                sock.sendall(request.encode('utf-8'))
-                data_received = bytearray()
-                while True:
-                    chunk = sock.recv(4096)
-                    if not chunk: break
-                    data_received.extend(chunk)
-                response_str = data_received.decode('utf-8', errors='ignore')
-                header_end = response_str.find('\r\n\r\n')
-                if header_end == -1: return {"status": "ERROR", "message": "Invalid HTTP response"}
-                body = response_str[header_end:].strip()
-                return json.loads(body) if body else {"status": "ERROR", "message": "Empty JSON body"}
-        except Exception as e:
-            print(f"Client Error: {e}")
-            return {"status": "ERROR", "message": str(e)}
+class NetworkWorker(threading.Thread):
+    # perintah dari klik dikirim berurutan oleh thread ini, balasannya masuk ke queue hasil
+    # sehingga loop pygame tidak pernah menunggu jaringan
+    def __init__(self, client, results):
+        threading.Thread.__init__(self, daemon=True)
+        self.client = client
+        self.results = results
+        self.commands = queue.Queue()
+
+    def submit(self, command):
+        self.commands.put(command)
+
+    def stop(self):
+        self.commands.put(None)
+
+    def run(self):
+        while True:
+            command = self.commands.get()
+            if command is None: break
+            try:
+                result = self.client.send_command(command)
+            except Exception as e:
+                # thread ini harus tetap hidup, kalau tidak semua klik berikutnya hilang
+                result = {"status": "ERROR", "message": str(e)}
+            self.results.put((command, result))
+        self.client.close()
 
 class UnoGame:
-    def __init__(self, screen, player_id):
+    def __init__(self, screen, player_id, room_id=None):
         self.screen = screen
         self.player_id = player_id
-        self.client = UnoClient(player_id)
+        self.client = UnoClient(player_id, room_id, binary=True)
         self.clock = pygame.time.Clock()
+        # state yang ditampilkan (bisa berisi prediksi aksi yang belum dibalas server)
+        # dan state terakhir yang benar-benar dikirim server
         self.state = {}
+        self.confirmed = {}
+        self.predicted_from = None
         self.hand_cards = []
         self.hand_card_rects = []
         self.callout_buttons = []
         self.scroll_x = 0
-        self.last_update_time = 0
-        self.UPDATE_INTERVAL = 1500
+        self.running = False
+        # balasan dari thread jaringan dan thread long-poll, diambil loop utama tiap frame
+        self.results = queue.Queue()
+        self.network = NetworkWorker(self.client, self.results)
+        # layar hanya digambar ulang jika ada yang berubah
+        self.needs_redraw = True
 
     def _update_local_state(self, new_state):
+        if new_state and new_state.get("status") == "NOT_MODIFIED": return
         if new_state and new_state.get("status") == "OK":
-            self.state = new_state
-            self.hand_cards = new_state.get("hand", [])
+            if new_state.get("version", 0) < self.confirmed.get("version", 0): return
+            if new_state.get("delta"):
+                if new_state.get("base_version") != self.confirmed.get("version"):
+                    # basis delta tidak sama dengan state lokal, minta state penuh
+                    self.network.submit(f"state {self.player_id}")
+                    return
+                new_state = self._apply_delta(new_state)
+            self.confirmed = new_state
+            # prediksi dibuang begitu server mengirim versi yang lebih baru
+            if self.predicted_from is None or new_state.get("version", 0) > self.predicted_from:
+                self.predicted_from = None
+                self._show(new_state)
         elif new_state:
             print(f"Server returned error: {new_state.get('message')}")
 
-    def _send_and_update(self, command):
-        response = self.client.send_command(command)
-        self._update_local_state(response)
+    def _show(self, state):
+        self.state = state
+        self.hand_cards = state.get("hand", [])
+        self.needs_redraw = True
+
+    def _apply_delta(self, delta):
+        return apply_delta(self.confirmed, delta)
+
+    def _poll_loop(self):
+        # long-polling: server baru membalas setelah versi state berubah (atau timeout)
+        poller = UnoClient(self.player_id, self.client.room_id, pool_size=1, timeout=LONG_POLL_TIMEOUT + 5, binary=True)
+        while self.running:
+            version = self.confirmed.get("version", -1)
+            new_state = poller.send_command(f"wait {self.player_id} {version} {LONG_POLL_TIMEOUT}")
+            if new_state.get("status") == "OK":
+                self.results.put(("wait", new_state))
+            else:
+                time.sleep(1)
+        poller.close()
+
+    def _take_results(self):
+        while True:
+            try:
+                command, response = self.results.get_nowait()
+            except queue.Empty:
+                return
+            if command.split(" ", 1)[0] in ("state", "wait"):
+                self._update_local_state(response)
+            elif response.get("status") != "OK":
+                # aksi ditolak server: prediksi dibatalkan, kembali ke state server terakhir
+                print(f"Server returned error: {response.get('message')}")
+                if self.predicted_from is not None:
+                    self.predicted_from = None
+                    self._show(self.confirmed)
+            if command.startswith("batch") and "state" in response:
+                self._update_local_state(response["state"])
+
+    def _predict(self, action, index=None, color=None):
+        # efek aksi langsung ditampilkan tanpa menunggu server, lalu diganti state server berikutnya
+        state = dict(self.state, your_turn=False, playable=[])
+        hand = list(self.hand_cards)
+        if action == "play":
+            card_str = hand.pop(index)
+            state["top_card"] = f"{color} {card_str.split(' ', 1)[1]}" if color else card_str
+            state["last_action_message"] = f"{self.player_id} memainkan {card_str}."
+        else:
+            state["last_action_message"] = f"{self.player_id} menarik kartu."
+        state["hand"] = hand
+        self.predicted_from = self.confirmed.get("version", -1)
+        self._show(state)
+
+    def _send_action(self, command):
+        self.network.submit(command)
+
+    def _send_move(self, action):
+        # main / tarik kartu dikirim sebagai batch, balasannya sekaligus membawa state terbaru
+        # sehingga prediksi langsung dikonfirmasi tanpa menunggu long-poll
+        self.network.submit(f"batch {self.player_id} {self.confirmed.get('version', -1)}\n{action}")
 
     def run(self):
-        self._send_and_update(f"state {self.player_id}")
+        self.network.start()
+        self.network.submit(f"state {self.player_id}")
         
         draw_btn_rect = pygame.Rect(SCREEN_WIDTH - 220, SCREEN_HEIGHT / 2, 180, 50)
         uno_btn_rect = pygame.Rect(SCREEN_WIDTH - 220, SCREEN_HEIGHT / 2 - 70, 180, 50)
         left_arrow_rect = pygame.Rect(10, SCREEN_HEIGHT - 170 + 40, 40, 40)
         right_arrow_rect = pygame.Rect(SCREEN_WIDTH - 50, SCREEN_HEIGHT - 170 + 40, 40, 40)
 
+        self.running = True
+        threading.Thread(target=self._poll_loop, daemon=True).start()
+
         running = True
+        drawn_hover, drawn_scroll = None, None
         while running:
+            self._take_results()
             is_my_turn = self.state.get("your_turn", False)
             winner = self.state.get("winner")
-            if not is_my_turn and not winner and pygame.time.get_ticks() - self.last_update_time > self.UPDATE_INTERVAL:
-                self.last_update_time = pygame.time.get_ticks()
-                self._send_and_update(f"state {self.player_id}")
 
             mouse_pos = pygame.mouse.get_pos()
             for event in pygame.event.get():
                 if event.type == pygame.QUIT: running = False
+                if event.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED): self.needs_redraw = True
                 if event.type == pygame.MOUSEWHEEL: self.scroll_x -= event.y * 40
                 if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
                     if left_arrow_rect.collidepoint(mouse_pos): self.scroll_x -= 60
                     elif right_arrow_rect.collidepoint(mouse_pos): self.scroll_x += 60
-                    elif uno_btn_rect.collidepoint(mouse_pos): self._send_and_update(f"uno {self.player_id}")
-                    elif draw_btn_rect.collidepoint(mouse_pos) and is_my_turn: self._send_and_update(f"draw {self.player_id}")
+                    elif uno_btn_rect.collidepoint(mouse_pos): self._send_action(f"uno {self.player_id}")
+                    elif draw_btn_rect.collidepoint(mouse_pos) and is_my_turn:
+                        self._predict("draw")
+                        self._send_move("draw")
                     else:
                         clicked_on_callout = False
                         for rect, target_id in self.callout_buttons:
                             if rect.collidepoint(mouse_pos):
-                                self._send_and_update(f"callout {self.player_id} {target_id}")
+                                self._send_action(f"callout {self.player_id} {target_id}")
                                 clicked_on_callout = True
                                 break
                         
                         if not clicked_on_callout and is_my_turn and not winner:
+                            playable = self.state.get("playable")
                             for i, rect in enumerate(self.hand_card_rects):
                                 if rect.collidepoint(mouse_pos):
+                                    # kartu yang tidak cocok tidak perlu dikirim ke server
+                                    if playable is not None and i not in playable: break
                                     card_str = self.hand_cards[i]
                                     if "black" in card_str:
                                         color = ask_color_choice(self.screen)
-                                        if color: self._send_and_update(f"play {self.player_id} {i} {color}")
+                                        self.needs_redraw = True
+                                        if color:
+                                            self._predict("play", i, color)
+                                            self._send_move(f"play {i} {color}")
                                     else:
-                                        self._send_and_update(f"play {self.player_id} {i}")
+                                        self._predict("play", i)
+                                        self._send_move(f"play {i}")
                                     break
             
-            self._update_ui_logic()
-            self._draw_all(mouse_pos, draw_btn_rect, uno_btn_rect, left_arrow_rect, right_arrow_rect)
+            if self.needs_redraw or self.scroll_x != drawn_scroll:
+                self._update_ui_logic()
+            hover = self._hover_index(mouse_pos)
+            if self.needs_redraw:
+                self._draw_all(hover, draw_btn_rect, uno_btn_rect, left_arrow_rect, right_arrow_rect)
+                pygame.display.flip()
+                self.needs_redraw = False
+            elif hover != drawn_hover or self.scroll_x != drawn_scroll:
+                # hanya hover / scroll yang berubah: cukup area kartu di tangan
+                self._draw_hand(hover, left_arrow_rect, right_arrow_rect)
+                pygame.display.update(HAND_AREA)
+            drawn_hover, drawn_scroll = hover, self.scroll_x
             
             self.clock.tick(30)
             if winner:
                 time.sleep(5)
                 running = False
         
+        self.running = False
+        self.network.stop()
         pygame.quit()
         sys.exit()
 
@@ -225,7 +361,30 @@ class UnoGame:
         max_scroll = max(0, total_hand_width - visible_width)
         self.scroll_x = max(0, min(self.scroll_x, max_scroll))
 
-    def _draw_all(self, mouse_pos, draw_btn, uno_btn, left_arrow, right_arrow):
+    def _can_play(self):
+        return self.state.get("your_turn", False) and not self.state.get("winner")
+
+    def _hover_index(self, mouse_pos):
+        if not self._can_play(): return None
+        playable = self.state.get("playable")
+        for i, rect in enumerate(self.hand_card_rects):
+            if rect.collidepoint(mouse_pos):
+                return i if playable is None or i in playable else None
+        return None
+
+    def _draw_hand(self, hover, left_arrow, right_arrow):
+        self.screen.fill(BACKGROUND_COLOR, HAND_AREA)
+        can_play = self._can_play()
+        playable = set(self.state.get("playable", range(len(self.hand_cards))))
+        for i, card_str in enumerate(self.hand_cards):
+            rect = self.hand_card_rects[i]
+            if rect.right > 0 and rect.left < SCREEN_WIDTH:
+                draw_card(self.screen, rect.x, rect.y, card_str, i == hover, dimmed=can_play and i not in playable)
+        if self.scroll_x > 0 or (self.hand_card_rects and self.hand_card_rects[-1].right > SCREEN_WIDTH):
+            draw_button(self.screen, "<", left_arrow, GRAY, WHITE, font=INPUT_FONT)
+            draw_button(self.screen, ">", right_arrow, GRAY, WHITE, font=INPUT_FONT)
+
+    def _draw_all(self, hover, draw_btn, uno_btn, left_arrow, right_arrow):
         self.screen.fill(BACKGROUND_COLOR)
         
         top_card = self.state.get("top_card", "")
@@ -243,16 +402,9 @@ class UnoGame:
         draw_text(self.screen, status_message, MSG_FONT, GRAY, (SCREEN_WIDTH / 2, 350))
 
         draw_text(self.screen, "Kartu Anda", INFO_FONT, WHITE, (SCREEN_WIDTH / 2, SCREEN_HEIGHT - 200))
-        for i, card_str in enumerate(self.hand_cards):
-            rect = self.hand_card_rects[i]
-            if rect.right > 0 and rect.left < SCREEN_WIDTH:
-                hover = is_my_turn and not winner and rect.collidepoint(mouse_pos)
-                draw_card(self.screen, rect.x, rect.y, card_str, hover)
+        self._draw_hand(hover, left_arrow, right_arrow)
         
         draw_button(self.screen, "Ambil Kartu", draw_btn, BLUE, WHITE, font=INFO_FONT)
-        if self.scroll_x > 0 or (self.hand_card_rects and self.hand_card_rects[-1].right > SCREEN_WIDTH):
-            draw_button(self.screen, "<", left_arrow, GRAY, WHITE, font=INPUT_FONT)
-            draw_button(self.screen, ">", right_arrow, GRAY, WHITE, font=INPUT_FONT)
         
         # --- PERUBAHAN UTAMA DI SINI ---
         # 1. Tentukan warna tombol UNO berdasarkan state semua pemain
@@ -274,19 +426,19 @@ class UnoGame:
                 text = f"{pid}: {count} kartu"
                 draw_text(self.screen, text, MSG_FONT, WHITE, (SCREEN_WIDTH - 10, y_offset), align="topright")
                 if on_uno:
-                    text_width = MSG_FONT.size(text)[0]
+                    text_width = render_text(text, MSG_FONT, WHITE).get_width()
                     btn_x = SCREEN_WIDTH - 10 - text_width - 10 - 50
                     rect = pygame.Rect(btn_x, y_offset - 3, 50, 24)
                     draw_button(self.screen, "!", rect, YELLOW, BLACK, font=MSG_FONT)
                     self.callout_buttons.append((rect, pid))
                 y_offset += 25
-        pygame.display.flip()
 
 def main():
     screen = pygame.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT))
+    room_id = sys.argv[1] if len(sys.argv) > 1 else None
     player_id = name_entry_scene(screen)
     if player_id:
-        game = UnoGame(screen, player_id)
+        game = UnoGame(screen, player_id, room_id)
         game.run()
 
 if __name__ == "__main__":
@@ -1,17 +1,168 @@
 import sys
+import logging
 import os.path
 import uuid
 import json
 import random
-from glob import glob
-from datetime import datetime
-from logic import Game
+import tempfile
+import time
+from email.utils import formatdate
+from urllib.parse import parse_qs
+import accesslog
+import metrics
+import tracing
+import wire
+from scheduler import Housekeeper
+from rooms import RoomRegistry, DEFAULT_ROOM, FANOUT_HEADER, request_room, is_cluster_wide
+from logic import BATCH_ACTIONS
+from httpparser import RequestParser, ParseError
+from staticfiles import StaticFiles, FileResponse
 
 COLORS = ['Red', 'Green', 'Blue', 'Yellow']
 NUMBERS = list(range(0, 10))
+LONG_POLL_TIMEOUT = 25
+LONG_POLL_MAX_TIMEOUT = 60
+EVENT_PING_INTERVAL = 15
+# pembaca /events yang tidak ikut membaca dan buffer keluarnya melewati batas ini diputus
+MAX_STREAM_BUFFER = 256 * 1024
+JSON_HEADERS = b"Content-type:application/json\r\n"
+
+try:
+    # encoder JSON yang lebih cepat jika terpasang, langsung menghasilkan bytes
+    import orjson
+
+    def json_bytes(obj):
+        return orjson.dumps(obj)
+except ImportError:
+    def json_bytes(obj):
+        return json.dumps(obj).encode()
+
+_status_prefixes = {}
+_date_header = (0, b"")
+
+def status_prefix(kode, message, keep_alive):
+    # baris status + header yang tidak pernah berubah, dibuat sekali per kode status
+    key = (kode, message, keep_alive)
+    prefix = _status_prefixes.get(key)
+    if prefix is None:
+        connection = 'keep-alive' if keep_alive else 'close'
+        prefix = "HTTP/1.1 {} {}\r\nConnection: {}\r\nServer: myserver/1.0\r\n".format(kode, message, connection).encode()
+        _status_prefixes[key] = prefix
+    return prefix
+
+def date_header():
+    # header Date hanya diformat ulang sekali per detik
+    global _date_header
+    now = int(time.time())
+    if _date_header[0] != now:
+        _date_header = (now, "Date: {}\r\n".format(formatdate(now, usegmt=True)).encode())
+    return _date_header[1]
+
+def request_finished(request, kode, nbytes):
+    # dipanggil engine setelah balasan terkirim: histogram /metrics dan access log
+    latency = time.perf_counter() - request.started
+    metrics.observe_request(request, kode, nbytes, latency)
+    accesslog.log_access(request, kode, nbytes, latency)
+    tracing.finish(request, kode, latency)
+
+class Response:
+    __slots__ = ('kode', 'message', 'body', 'headers', 'content_length', 'keep_alive')
+
+    def __init__(self, kode, message, body, headers, content_length):
+        self.kode = kode
+        self.message = message
+        self.body = body
+        self.headers = headers
+        self.content_length = content_length
+        self.keep_alive = False
+
+    def head(self):
+        resp = [status_prefix(self.kode, self.message, self.keep_alive), date_header(),
+                b"Content-Length: %d\r\n" % self.content_length]
+        if type(self.headers) is bytes:
+            resp.append(self.headers)
+        else:
+            for kk in self.headers:
+                resp.append("{}:{}\r\n".format(kk, self.headers[kk]).encode())
+        resp.append(b"\r\n")
+        return b"".join(resp)
+
+    def buffers(self):
+        # header dan body dikirim terpisah (sendmsg / writelines) tanpa digabung dulu
+        if self.body:
+            return [self.head(), self.body]
+        return [self.head()]
+
+    def to_bytes(self):
+        return b"".join(self.buffers())
+
+class LongPoll:
+    # balasan untuk perintah "wait" yang belum bisa dikirim karena state belum berubah.
+    # HttpServer.proses memanggil block(), kedua engine menunggu lewat game.add_listener
+    def __init__(self, httpserver, game, room_id, player_id, version, timeout, encode):
+        self.httpserver = httpserver
+        self.encode = encode
+        self.game = game
+        self.room_id = room_id
+        self.player_id = player_id
+        self.version = version
+        self.timeout = timeout
+        self.keep_alive = False
+        self.listener = None
+        self.timer = None
+
+    def ready(self):
+        return self.game.version != self.version
+
+    def render(self):
+        hasil = self.httpserver.state_response(self.game, self.room_id, self.player_id, self.version, self.encode)
+        hasil.keep_alive = self.keep_alive
+        return hasil
+
+    def block(self):
+        self.game.wait_for_change(self.version, self.timeout)
+        return self.render()
+
+class EventStream:
+    # koneksi Server-Sent Events: menerima event publik game sampai client menutup koneksi
+    def __init__(self, game, room_id, player_id=None, housekeeper=None):
+        self.game = game
+        self.room_id = room_id
+        # pemain yang menonton lewat /events?player=<id> tidak dikeluarkan scheduler selama stream terbuka
+        self.player_id = player_id
+        self.housekeeper = housekeeper
+        self.listener = None
+        self.ping_timer = None
+
+    def head(self):
+        resp = []
+        resp.append("HTTP/1.1 200 OK\r\n")
+        resp.append("Server: myserver/1.0\r\n")
+        resp.append("Content-Type: text/event-stream\r\n")
+        resp.append("Cache-Control: no-cache\r\n")
+        resp.append("Connection: keep-alive\r\n")
+        resp.append("\r\n")
+        state = dict(self.game.get_public_state(), room=self.room_id)
+        sync = f"id: {state['version']}\nevent: sync\ndata: {json.dumps(state)}\n\n"
+        return ''.join(resp).encode() + sync.encode()
+
+    def frames(self, events):
+        return b"".join(event.sse_frame() for event in events)
+
+    def attach(self, listener):
+        # dipanggil engine saat stream dibuka / ditutup
+        self.listener = listener
+        self.game.add_listener(listener)
+        if self.housekeeper is not None and self.player_id:
+            self.housekeeper.watch(self.game, self.player_id, 1)
+
+    def detach(self):
+        self.game.remove_listener(self.listener)
+        if self.housekeeper is not None and self.player_id:
+            self.housekeeper.watch(self.game, self.player_id, -1)
 
 class HttpServer:
-    def __init__(self):
+    def __init__(self, journal=None, admin_token=None, owns_room=None, housekeeping=None, profile_dir=None):
         self.sessions = {}
         self.types = {
             '.pdf': 'application/pdf',
@@ -19,48 +170,118 @@ class HttpServer:
             '.txt': 'text/plain',
             '.html': 'text/html'
         }
-        self.game = Game()
+        self.rooms = RoomRegistry(journal, owns_room)
+        # mode prefork: request untuk room milik proses lain dibalas 421
+        self.owns_room = owns_room
+        # housekeeping: argumen Housekeeper (turn_timeout, idle_timeout, game_ttl, finished_ttl)
+        self.housekeeper = Housekeeper(self.rooms, **housekeeping) if housekeeping is not None else None
+        # POST /admin hanya aktif jika server dijalankan dengan token
+        self.admin_token = admin_token
+        # hasil profiler ditulis di luar root file statis ('./') agar tidak bisa diunduh lewat GET
+        self.profile_dir = profile_dir or os.path.join(tempfile.gettempdir(), "uno-profiles")
+        metrics.register_gauge("uno_games_active", lambda: len(self.rooms))
+        metrics.register_gauge("uno_games_finished", lambda: sum(1 for game in list(self.rooms.rooms.values()) if game.winner))
+        metrics.register_gauge("uno_players", lambda: sum(len(game.players) for game in list(self.rooms.rooms.values())))
+        self.static = StaticFiles('./', self.types)
+        static_root = os.path.realpath(self.static.root)
+        if os.path.commonpath([static_root, os.path.realpath(self.profile_dir)]) == static_root:
+            raise ValueError("profile_dir tidak boleh berada di dalam root file statis {}".format(static_root))
 
-    def response(self, kode=404, message='Not Found', messagebody=bytes(), headers={}):
-        tanggal = datetime.now().strftime('%c')
-        resp = []
-        resp.append("HTTP/1.0 {} {}\r\n".format(kode, message))
-        resp.append("Date: {}\r\n".format(tanggal))
-        resp.append("Connection: close\r\n")
-        resp.append("Server: myserver/1.0\r\n")
-        resp.append("Content-Length: {}\r\n".format(len(messagebody)))
-        for kk in headers:
-            resp.append("{}:{}\r\n".format(kk, headers[kk]))
-        resp.append("\r\n")
-
-        response_headers = ''.join(resp)
+    def response(self, kode=404, message='Not Found', messagebody=bytes(), headers={}, content_length=None):
         if (type(messagebody) is not bytes):
             messagebody = messagebody.encode()
+        if content_length is None:
+            content_length = len(messagebody)
+        return Response(kode, message, messagebody, headers, content_length)
+
+    def json_response(self, result):
+        with tracing.span("encode"):
+            body = json_bytes(result)
+        return self.response(200, "OK", body, JSON_HEADERS)
 
-        return response_headers.encode() + messagebody
+    def wire_response(self, result):
+        with tracing.span("encode"):
+            body = wire.encode(result)
+        return self.response(200, "OK", body, wire.HEADERS)
 
     def proses(self, data):
-        requests = data.split("\r\n")
-        baris = requests[0]
-        all_headers = [n for n in requests[1:] if n != '']
+        try:
+            requests = RequestParser().feed(data.encode(), complete=True)
+        except ParseError as e:
+            return self.response(e.kode, e.message, '', {}).to_bytes()
+        if not requests:
+            return self.response(400, 'Bad Request', '', {}).to_bytes()
+        hasil, keep_alive = self.handle_request(requests[0])
+        if isinstance(hasil, LongPoll):
+            hasil = hasil.block()
+        elif isinstance(hasil, EventStream):
+            # tanpa koneksi hanya bisa dikirim event awal
+            return hasil.head()
+        elif isinstance(hasil, FileResponse):
+            return hasil.response.head() + hasil.read()
+        return hasil.to_bytes()
+
+    def error_response(self, error):
+        # dipakai engine jika RequestParser menolak request; koneksi selalu ditutup setelahnya
+        return self.response(error.kode, error.message, error.message, {})
 
-        j = baris.split(" ")
+    def handle_request(self, request):
+        tracing.activate(request.trace)
         try:
-            method = j[0].upper().strip()
-            if method == 'GET':
-                object_address = j[1].strip()
-                return self.http_get(object_address, all_headers)
-            elif method == 'POST':
-                object_address = j[1].strip()
-                return self.http_post(object_address, all_headers)
+            return self._handle_request(request)
+        finally:
+            tracing.activate(None)
+
+    def _handle_request(self, request):
+        keep_alive = request.keep_alive
+        if self.owns_room is not None:
+            room_id = request_room(request)
+            if room_id is not None:
+                misdirected = not self.owns_room(room_id)
+            else:
+                # /metrics, daftar room dan /admin digabung dispatcher dari semua worker;
+                # di koneksi yang sudah diserahkan ke worker ini jawabannya hanya sebagian
+                misdirected = is_cluster_wide(request) and FANOUT_HEADER not in request.headers
+            if misdirected:
+                # koneksi keep-alive pindah ke room proses lain: client harus membuka koneksi baru
+                hasil = self.response(421, 'Misdirected Request', 'Room is served by another worker, reconnect', {})
+                hasil.keep_alive = False
+                return hasil, False
+        if request.method == 'GET':
+            hasil = self.http_get(request.path, request.headers)
+        elif request.method == 'POST':
+            body = self._request_body(request)
+            if body is None:
+                hasil = self.response(400, 'Bad Request', 'Invalid binary command', {})
             else:
-                return self.response(400, 'Bad Request', '', {})
-        except IndexError:
-            return self.response(400, 'Bad Request', '', {})
+                if request.path == "/uno" or request.path.startswith("/uno/"):
+                    # field cmd= / player= access log hanya untuk perintah game; body /admin dan /rooms
+                    # bukan "<perintah> <pemain>" (mis. "profile 1")
+                    parts = body.split(None, 2)
+                    request.command = parts[0] if parts else None
+                    request.player = parts[1] if len(parts) > 1 else None
+                hasil = self.http_post(request.path, request.headers, body)
+        else:
+            hasil = self.response(400, 'Bad Request', '', {})
+
+        if isinstance(hasil, EventStream):
+            return hasil, True
+        if isinstance(hasil, FileResponse):
+            hasil.response.keep_alive = keep_alive
+        hasil.keep_alive = keep_alive
+        return hasil, keep_alive
+
+    def _request_body(self, request):
+        # perintah biner diubah ke baris teks yang sama, dispatcher /uno hanya satu
+        if not wire.is_binary(request.headers):
+            return request.body.decode('utf-8', errors='replace')
+        try:
+            return wire.decode_command(request.body)
+        except (ValueError, IndexError, UnicodeDecodeError):
+            return None
 
     def http_get(self, object_address, headers):
-        files = glob('./*')
-        thedir = './'
+        object_address, _, query = object_address.partition('?')
         if object_address == '/':
             return self.response(200, 'OK', 'Ini Adalah web Server percobaan', {})
 
@@ -68,59 +289,125 @@ class HttpServer:
             return self.response(302, 'Found', '', {'location': 'https://youtu.be/katoxpnTf04'})
         if object_address == '/santai':
             return self.response(200, 'OK', 'santai saja', {})
+        if object_address == '/events' or object_address.startswith('/events/'):
+            room_id = object_address[len('/events/'):] if object_address.startswith('/events/') else DEFAULT_ROOM
+            game = self.rooms.get(room_id)
+            if game is None:
+                return self.response(404, 'Not Found', 'Room not found', {})
+            player_id = parse_qs(query).get('player', [None])[0]
+            return EventStream(game, room_id, player_id, self.housekeeper)
+        if object_address == '/rooms':
+            rooms = self.rooms.list_rooms()
+            return self.json_response({"status": "OK", "rooms": rooms})
+        if object_address == '/metrics':
+            return self.response(200, 'OK', metrics.render(), {'Content-type': 'text/plain; version=0.0.4'})
 
-        object_address = object_address[1:]
-        if thedir + object_address not in files:
+        entry = self.static.lookup(object_address[1:])
+        if entry is None:
             return self.response(404, 'Not Found', '', {})
-        with open(thedir + object_address, 'rb') as fp:
-            isi = fp.read()
+        file_headers = {'Content-type': entry.content_type, 'ETag': entry.etag,
+                        'Last-Modified': entry.last_modified, 'Accept-Ranges': 'bytes'}
+        if self.static.not_modified(entry, headers):
+            del file_headers['Content-type']
+            return self.response(304, 'Not Modified', '', file_headers)
 
-        fext = os.path.splitext(thedir + object_address)[1]
-        content_type = self.types.get(fext, 'application/octet-stream')
+        byte_range = self.static.byte_range(entry, headers.get('range'))
+        if byte_range is False:
+            return self.response(416, 'Range Not Satisfiable', '', {'Content-Range': 'bytes */{}'.format(entry.size)})
+        if byte_range is None:
+            kode, message, offset, length = 200, 'OK', 0, entry.size
+        else:
+            offset, length = byte_range
+            kode, message = 206, 'Partial Content'
+            file_headers['Content-Range'] = 'bytes {}-{}/{}'.format(offset, offset + length - 1, entry.size)
 
-        return self.response(200, 'OK', isi, {'Content-type': content_type})
+        if entry.content is not None:
+            return self.response(kode, message, entry.content[offset:offset + length], file_headers)
+        head = self.response(kode, message, '', file_headers, content_length=length)
+        return FileResponse(head, entry, offset, length)
 
-    def http_post(self, object_address, headers):
+    def _room_from_address(self, object_address):
+        # /uno -> room default, /uno/<room_id> -> room tertentu
         if object_address == "/uno":
+            return DEFAULT_ROOM
+        if object_address.startswith("/uno/"):
+            return object_address[len("/uno/"):]
+        return None
+
+    def http_post(self, object_address, headers, body=''):
+        if object_address == "/rooms":
+            return self.http_post_rooms(headers, body)
+        if object_address == "/admin":
+            return self.http_post_admin(headers, body)
+
+        room_id = self._room_from_address(object_address)
+        if room_id is not None:
+            game = self.rooms.get(room_id)
+            if game is None:
+                return self.response(404, 'Not Found', 'Room not found', {})
+            # balasan biner jika client memintanya lewat Accept (atau mengirim perintah biner)
+            encode = self.wire_response if wire.accepts(headers) or wire.is_binary(headers) else self.json_response
             try:
-                body_data = "\r\n".join(headers).split("\r\n\r\n")[-1].strip()
-                command_line = body_data.strip()
-                print(f"[DEBUG] Command received: {command_line}")
+                command_line = body.strip()
+                logging.debug("command received (%s): %s", room_id, command_line)
                 parts = command_line.split()
                 if len(parts) < 2:
                     return self.response(400, 'Bad Request', 'Invalid command format', {})
 
                 command, player_id = parts[0], parts[1]
 
-                if not self.game.has_player(player_id):
-                    self.game.add_player(player_id)
+                # di dalam lock game: scheduler memeriksa ulang waktu request terakhir di lock yang sama
+                # sebelum mengeluarkan pemain, jadi pemain tidak dikeluarkan di tengah request-nya
+                with game.lock:
+                    if not game.has_player(player_id):
+                        with tracing.span("logic"):
+                            game.add_player(player_id)
+                    if self.housekeeper is not None:
+                        self.housekeeper.seen(game, player_id)
 
-                if command == "state":
-                    state = self.game.get_full_game_state(player_id)
-                    return self.response(200, "OK", json.dumps(state) + "\r\n\r\n", {'Content-type': 'application/json'})
+                if command in ("state", "join"):
+                    # state <player> <versi>: balas hanya field yang berubah sejak versi itu
+                    known_version = int(parts[2]) if len(parts) > 2 else None
+                    return self.state_response(game, room_id, player_id, known_version, encode)
+
+                elif command == "wait":
+                    # wait <player> <versi terakhir> [timeout]: tahan balasan sampai versi berubah
+                    known_version = int(parts[2]) if len(parts) > 2 else -1
+                    timeout = float(parts[3]) if len(parts) > 3 else LONG_POLL_TIMEOUT
+                    timeout = max(0, min(timeout, LONG_POLL_MAX_TIMEOUT))
+                    if game.version != known_version or timeout == 0:
+                        return self.state_response(game, room_id, player_id, known_version, encode)
+                    return LongPoll(self, game, room_id, player_id, known_version, timeout, encode)
 
                 elif command == "play":
                     if len(parts) < 3:
                         return self.response(400, 'Bad Request', 'Index not specified', {})
                     index = int(parts[2])
                     new_color = parts[3] if len(parts) > 3 else None
-                    result = self.game.play_card(player_id, index, new_color)
-                    return self.response(200, "OK", json.dumps(result) + "\r\n\r\n", {'Content-type': 'application/json'})
+                    with tracing.span("logic"):
+                        result = game.play_card(player_id, index, new_color)
+                    return encode(result)
 
                 elif command == "draw":
-                    result = self.game.draw_card(player_id)
-                    return self.response(200, "OK", json.dumps(result) + "\r\n\r\n", {'Content-type': 'application/json'})
+                    with tracing.span("logic"):
+                        result = game.draw_card(player_id)
+                    return encode(result)
 
                 elif command == "uno":
-                    result = self.game.declare_uno(player_id)
-                    return self.response(200, "OK", json.dumps(result) + "\r\n\r\n", {'Content-type': 'application/json'})
+                    with tracing.span("logic"):
+                        result = game.declare_uno(player_id)
+                    return encode(result)
 
                 elif command == "callout":
                     if len(parts) < 3:
                         return self.response(400, 'Bad Request', 'Target player ID not specified', {})
                     target_id = parts[2]
-                    result = self.game.call_out_player(player_id, target_id)
-                    return self.response(200, "OK", json.dumps(result) + "\r\n\r\n", {'Content-type': 'application/json'})
+                    with tracing.span("logic"):
+                        result = game.call_out_player(player_id, target_id)
+                    return encode(result)
+
+                elif command == "batch":
+                    return self.batch_response(game, room_id, player_id, command_line, encode)
 
                 else:
                     return self.response(400, 'Bad Request', 'Unknown command', {})
@@ -130,6 +417,105 @@ class HttpServer:
         else:
             return self.response(404, 'Not Found', 'Unknown endpoint', {})
 
+    def state_response(self, game, room_id, player_id, known_version=None, encode=None):
+        # tanpa versi (atau versi tidak dikenal) balasannya state penuh
+        with tracing.span("logic"):
+            state = game.get_state_delta(player_id, known_version)
+        if "hand" in state:
+            state["room"] = room_id
+        return (encode or self.json_response)(state)
+
+    def batch_response(self, game, room_id, player_id, command_line, encode):
+        # batch <player> [versi]; play <index> [warna]; uno; draw; callout <target>
+        # (pemisah ";" atau baris baru). aksi dijalankan berurutan sebagai satu perubahan,
+        # balasannya hasil tiap aksi + state (delta terhadap versi) dalam satu round trip
+        lines = [line.split() for line in command_line.replace(";", "\n").splitlines() if line.strip()]
+        known_version = int(lines[0][2]) if len(lines[0]) > 2 else None
+        commands = []
+        for line in lines[1:]:
+            action, args = line[0], line[1:]
+            if action not in BATCH_ACTIONS:
+                return self.response(400, 'Bad Request', 'Unknown command in batch: {}'.format(action), {})
+            if action == "play":
+                if not args:
+                    return self.response(400, 'Bad Request', 'Index not specified', {})
+                args = [int(args[0])] + args[1:2]
+            elif action == "callout":
+                if not args:
+                    return self.response(400, 'Bad Request', 'Target player ID not specified', {})
+                args = args[:1]
+            else:
+                args = []
+            commands.append([action, args])
+        if not commands:
+            return self.response(400, 'Bad Request', 'Empty batch', {})
+        with tracing.span("logic"):
+            result = game.run_batch(player_id, commands)
+            state = game.get_state_delta(player_id, known_version)
+        if "hand" in state:
+            state["room"] = room_id
+        result["state"] = state
+        return encode(result)
+
+    def http_post_rooms(self, headers, body=''):
+        parts = body.split()
+        if not parts:
+            return self.response(400, 'Bad Request', 'Invalid command format', {})
+
+        command = parts[0]
+        if command == "create":
+            room_id = self.rooms.create(parts[1] if len(parts) > 1 else None)
+            if room_id is None:
+                return self.response(409, 'Conflict', 'Room already exists or invalid room id', {})
+            result = {"status": "OK", "room": room_id}
+        elif command == "list":
+            result = {"status": "OK", "rooms": self.rooms.list_rooms()}
+        elif command == "close":
+            if len(parts) < 2:
+                return self.response(400, 'Bad Request', 'Room ID not specified', {})
+            if not self.rooms.close(parts[1]):
+                return self.response(404, 'Not Found', 'Room not found', {})
+            result = {"status": "OK", "room": parts[1]}
+        else:
+            return self.response(400, 'Bad Request', 'Unknown command', {})
+        return self.json_response(result)
+
+    def http_post_admin(self, headers, body=''):
+        # perintah operator: trace on [rate] | trace off | traces [n] | profile <detik>
+        if self.admin_token is None:
+            return self.response(404, 'Not Found', 'Unknown endpoint', {})
+        if headers.get('x-admin-token') != self.admin_token:
+            return self.response(403, 'Forbidden', 'Invalid admin token', {})
+        parts = body.split()
+        if not parts:
+            return self.response(400, 'Bad Request', 'Invalid command format', {})
+        try:
+            return self._admin_command(parts)
+        except ValueError:
+            return self.response(400, 'Bad Request', 'Invalid number', {})
+
+    def _admin_command(self, parts):
+        command = parts[0]
+        if command == "trace" and len(parts) > 1 and parts[1] in ("on", "off"):
+            tracing.configure(parts[1] == "on", float(parts[2]) if len(parts) > 2 else None)
+            result = {"status": "OK", "tracing": tracing.enabled, "sample_rate": tracing.sample_rate}
+        elif command == "traces":
+            count = int(parts[1]) if len(parts) > 1 else 20
+            result = {"status": "OK", "traces": list(tracing.recent)[-count:]}
+        elif command == "profile":
+            if len(parts) < 2:
+                return self.response(400, 'Bad Request', 'Duration not specified', {})
+            seconds = max(1, min(float(parts[1]), 300))
+            # nama file dibuat server, di profile_dir
+            os.makedirs(self.profile_dir, exist_ok=True)
+            path = os.path.join(self.profile_dir, "profile-{}-{}.folded".format(int(time.time() * 1000), os.getpid()))
+            if tracing.SamplingProfiler.start_profile(seconds, path) is None:
+                return self.response(409, 'Conflict', 'Profiler already running', {})
+            result = {"status": "OK", "seconds": seconds, "file": path}
+        else:
+            return self.response(400, 'Bad Request', 'Unknown command', {})
+        return self.json_response(result)
+
 if __name__ == "__main__":
     httpserver = HttpServer()
     d = httpserver.proses('POST /uno HTTP/1.0\r\n\r\nstate player1\r\n\r\n')
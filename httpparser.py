@@ -0,0 +1,111 @@
+import time
+
+MAX_HEADER_SIZE = 8 * 1024
+MAX_BODY_SIZE = 64 * 1024
+
+class ParseError(Exception):
+    def __init__(self, kode, message):
+        Exception.__init__(self, message)
+        self.kode = kode
+        self.message = message
+
+class Request:
+    def __init__(self, method, path, version, headers):
+        self.method = method
+        self.path = path
+        self.version = version
+        self.headers = headers
+        self.body = bytes()
+        # diisi HttpServer untuk access log
+        self.command = None
+        self.player = None
+        self.started = time.perf_counter()
+        # diisi tracing.begin jika request ini di-sampling
+        self.trace = None
+
+    @property
+    def keep_alive(self):
+        connection = self.headers.get('connection', '').lower()
+        if self.version == 'HTTP/1.1':
+            return connection != 'close'
+        return connection == 'keep-alive'
+
+class RequestParser:
+    # parser inkremental: bytes dari socket cukup di-feed, request yang sudah lengkap dikembalikan.
+    # akhir header dicari sekali (mulai dari posisi terakhir), body dibaca sesuai Content-Length
+    def __init__(self, max_header_size=MAX_HEADER_SIZE, max_body_size=MAX_BODY_SIZE):
+        self.max_header_size = max_header_size
+        self.max_body_size = max_body_size
+        self.buffer = bytearray()
+        self.scan_from = 0
+        self.request = None
+        self.body_length = 0
+        self.complete = False
+
+    def feed(self, data, complete=False):
+        # complete=True: data sudah berisi seluruh pesan (mis. HttpServer.proses),
+        # POST tanpa Content-Length boleh memakai sisa data sebagai body
+        self.complete = complete
+        self.buffer += data
+        requests = []
+        request = self._next()
+        while request is not None:
+            requests.append(request)
+            request = self._next()
+        return requests
+
+    def _next(self):
+        if self.request is None:
+            header_end = self.buffer.find(b"\r\n\r\n", self.scan_from)
+            if header_end == -1:
+                if len(self.buffer) > self.max_header_size:
+                    raise ParseError(431, 'Request Header Fields Too Large')
+                # \r\n\r\n bisa terpotong di batas chunk, mulai lagi 3 byte sebelum akhir
+                self.scan_from = max(0, len(self.buffer) - 3)
+                return None
+            if header_end > self.max_header_size:
+                raise ParseError(431, 'Request Header Fields Too Large')
+            self.request = self._parse_head(bytes(memoryview(self.buffer)[:header_end]))
+            del self.buffer[:header_end + 4]
+            self.scan_from = 0
+
+        if self.body_length is None:
+            # client lama mengirim POST HTTP/1.0 tanpa Content-Length: sisa buffer dianggap body
+            self.body_length = len(self.buffer)
+            if self.body_length > self.max_body_size:
+                raise ParseError(413, 'Payload Too Large')
+        if len(self.buffer) < self.body_length:
+            return None
+        request = self.request
+        request.body = bytes(memoryview(self.buffer)[:self.body_length])
+        del self.buffer[:self.body_length]
+        self.request = None
+        return request
+
+    def _parse_head(self, head):
+        lines = head.decode('iso-8859-1').split("\r\n")
+        j = lines[0].split(" ")
+        if len(j) < 2:
+            raise ParseError(400, 'Bad Request')
+        method, path = j[0].upper().strip(), j[1].strip()
+        version = j[2].strip() if len(j) > 2 else 'HTTP/1.0'
+
+        headers = {}
+        for baris in lines[1:]:
+            nama, sep, nilai = baris.partition(":")
+            if not sep:
+                raise ParseError(400, 'Bad Request')
+            headers[nama.strip().lower()] = nilai.strip()
+        request = Request(method, path, version, headers)
+
+        content_length = headers.get('content-length')
+        if content_length is None:
+            legacy = not request.keep_alive or self.complete
+            self.body_length = None if method == 'POST' and legacy else 0
+        elif not content_length.isdigit():
+            raise ParseError(400, 'Bad Request')
+        else:
+            self.body_length = int(content_length)
+            if self.body_length > self.max_body_size:
+                raise ParseError(413, 'Payload Too Large')
+        return request
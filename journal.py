@@ -0,0 +1,168 @@
+# journal.py
+import atexit
+import json
+import logging
+import os
+import threading
+from logic import Game
+
+FSYNC_MODES = ("always", "batch", "off")
+FLUSH_INTERVAL = 0.05
+CHECKPOINT_EVERY = 1000
+
+def segment_name(number):
+    return "journal-{:08d}.log".format(number)
+
+def list_segments(directory):
+    segments = []
+    for name in os.listdir(directory):
+        if name.startswith("journal-") and name.endswith(".log") and name[8:-4].isdigit():
+            segments.append(int(name[8:-4]))
+    return sorted(segments)
+
+def read_records(directory):
+    # semua record dari segmen lama ke baru; baris terakhir yang terpotong (crash saat menulis) dilewati
+    for number in list_segments(directory):
+        with open(os.path.join(directory, segment_name(number)), encoding="utf-8") as fp:
+            for line in fp:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    logging.warning("journal: record rusak di {} diabaikan".format(segment_name(number)))
+
+def replay(records):
+    # bangun ulang semua room: create membuat game dari seed, snapshot mengganti state,
+    # aksi dijalankan ulang lewat method Game yang sama dengan yang dipanggil server
+    games = {}
+    for record in records:
+        room_id, op = record["room"], record["op"]
+        game = games.get(room_id)
+        if op == "create":
+            if game is None:
+                games[room_id] = Game(record["seed"])
+        elif op == "close":
+            games.pop(room_id, None)
+        elif op == "snapshot":
+            games[room_id] = Game.from_dict(record["state"])
+        elif game is not None and record["version"] > game.version:
+            # record yang sudah tercakup snapshot (versi <= versi game) dilewati
+            getattr(game, op)(*record["args"])
+            if game.version != record["version"]:
+                logging.warning("journal: versi room {} tidak cocok ({} != {})".format(room_id, game.version, record["version"]))
+    return games
+
+class Journal:
+    # log append-only berisi setiap aksi yang diterima, satu JSON per baris.
+    # fsync: always = fsync tiap record, batch = record dikumpulkan lalu ditulis + fsync
+    # sekali per FLUSH_INTERVAL oleh thread writer, off = tanpa fsync.
+    # setiap CHECKPOINT_EVERY record dibuka segmen baru yang diawali snapshot semua room,
+    # segmen lama lalu dihapus sehingga waktu recovery tetap terbatas
+    def __init__(self, directory, fsync="batch", flush_interval=FLUSH_INTERVAL, checkpoint_every=CHECKPOINT_EVERY):
+        if fsync not in FSYNC_MODES:
+            raise ValueError("fsync harus salah satu dari {}".format(", ".join(FSYNC_MODES)))
+        self.directory = directory
+        self.fsync = fsync
+        self.flush_interval = flush_interval
+        self.checkpoint_every = checkpoint_every
+        self.lock = threading.Lock()
+        self.write_lock = threading.Lock()
+        self.pending = []
+        self.segment = None
+        self.segment_records = 0
+        self.file = None
+        self.registry = None
+        self.recovered = 0
+        self.closed = threading.Event()
+        self.thread = None
+        os.makedirs(directory, exist_ok=True)
+
+    def recover(self):
+        records = list(read_records(self.directory))
+        self.recovered = len(records)
+        return replay(records)
+
+    def start(self, registry):
+        # dipanggil RoomRegistry setelah recovery. tidak ada checkpoint di sini: segmen lama tetap
+        # dipakai (dan aksinya tetap bisa di-replay / --bench) sampai checkpoint berkala berikutnya,
+        # yang juga ikut menghitung record hasil recovery agar waktu recovery tetap terbatas
+        self.registry = registry
+        segments = list_segments(self.directory)
+        with self.write_lock:
+            self.segment = segments[-1] + 1 if segments else 1
+            self.file = open(os.path.join(self.directory, segment_name(self.segment)), "a", encoding="utf-8")
+            with self.lock:
+                self.segment_records = self.recovered
+        self.thread = threading.Thread(target=self._run, name="journal-writer", daemon=True)
+        self.thread.start()
+        atexit.register(self.close)
+
+    def record(self, room_id, game, action, args):
+        # dipanggil di dalam lock game (lihat logic.serialized)
+        self._append({"room": room_id, "version": game.version, "op": action, "args": list(args)})
+
+    def record_room(self, room_id, op, game):
+        record = {"room": room_id, "version": game.version, "op": op}
+        if op == "create":
+            record["seed"] = game.seed
+        self._append(record)
+
+    def _append(self, record):
+        line = json.dumps(record, separators=(",", ":")) + "\n"
+        with self.lock:
+            self.pending.append(line)
+            self.segment_records += 1
+        if self.fsync == "always":
+            self.flush()
+
+    def flush(self):
+        with self.write_lock:
+            self._flush_locked()
+
+    def _flush_locked(self):
+        with self.lock:
+            batch, self.pending = self.pending, []
+        if not batch or self.file is None:
+            return
+        self.file.write("".join(batch))
+        self.file.flush()
+        if self.fsync != "off":
+            os.fsync(self.file.fileno())
+
+    def checkpoint(self, number=None):
+        with self.write_lock:
+            self._flush_locked()
+            old = list_segments(self.directory)
+            if self.file is not None:
+                self.file.close()
+            self.segment = number if number is not None else self.segment + 1
+            self.file = open(os.path.join(self.directory, segment_name(self.segment)), "a", encoding="utf-8")
+            with self.lock:
+                self.segment_records = 0
+        for room_id, game in list(self.registry.rooms.items()):
+            with game.lock:
+                # room yang ditutup saat checkpoint berjalan tidak ikut di-snapshot
+                if self.registry.get(room_id) is game:
+                    self._append({"room": room_id, "version": game.version, "op": "snapshot", "state": game.to_dict()})
+        self.flush()
+        for number in old:
+            if number < self.segment:
+                os.remove(os.path.join(self.directory, segment_name(number)))
+
+    def _run(self):
+        while not self.closed.wait(self.flush_interval):
+            try:
+                self.flush()
+                if self.segment_records >= self.checkpoint_every:
+                    self.checkpoint()
+            except OSError as e:
+                logging.error("journal: gagal menulis ({})".format(e))
+
+    def close(self):
+        if self.closed.is_set():
+            return
+        self.closed.set()
+        self.flush()
+        with self.write_lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
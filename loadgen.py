@@ -0,0 +1,235 @@
+# loadgen.py
+# Load generator tanpa pygame: N bot per meja x M meja memainkan UNO lewat protokol POST /uno
+# yang sama dengan client.py, lalu mencatat throughput dan latency p50/p95/p99 per perintah.
+#   python3 loadgen.py --port 8889 --tables 10 --players 4 --duration 30
+#   python3 loadgen.py --inprocess --tables 10 --players 4 --think 0   (langsung ke HttpServer.proses)
+import argparse
+import json
+import random
+import threading
+import time
+from unoclient import UnoClient, apply_delta
+
+LONG_POLL_TIMEOUT = 5
+
+class InProcessClient:
+    # antarmuka sama dengan UnoClient, tetapi request dikirim ke HttpServer.proses tanpa socket
+    def __init__(self, httpserver, player_id, room_id=None):
+        self.httpserver = httpserver
+        self.player_id = player_id
+        self.room_id = room_id
+        self.path = f"/uno/{room_id}" if room_id else "/uno"
+
+    def send_command(self, command_body, path=None):
+        request = (f"POST {path or self.path} HTTP/1.1\r\n"
+                   f"Content-Length: {len(command_body.encode('utf-8'))}\r\n\r\n{command_body}")
+        response = self.httpserver.proses(request)
+        body = response[response.find(b"\r\n\r\n") + 4:].decode('utf-8', errors='ignore').strip()
+        try:
+            return json.loads(body)
+        except ValueError:
+            return {"status": "ERROR", "message": body}
+
+    def close(self):
+        pass
+
+class Stats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.latencies = {}
+        self.errors = {}
+
+    def merge(self, latencies, errors):
+        with self.lock:
+            for command, values in latencies.items():
+                self.latencies.setdefault(command, []).extend(values)
+            for command, count in errors.items():
+                self.errors[command] = self.errors.get(command, 0) + count
+
+    def report(self, duration):
+        rows = []
+        for command in sorted(self.latencies):
+            values = sorted(self.latencies[command])
+            rows.append({
+                "command": command,
+                "count": len(values),
+                "rps": len(values) / duration,
+                "errors": self.errors.get(command, 0),
+                "p50_ms": percentile(values, 50) * 1000,
+                "p95_ms": percentile(values, 95) * 1000,
+                "p99_ms": percentile(values, 99) * 1000,
+                "max_ms": values[-1] * 1000
+            })
+        return rows
+
+def percentile(values, p):
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * p / 100))]
+
+class Bot(threading.Thread):
+    # satu pemain: menunggu giliran lewat long-poll "wait", berpikir sejenak, lalu main / tarik kartu
+    def __init__(self, make_client, table, seat, args, stats, deadline):
+        threading.Thread.__init__(self, daemon=True)
+        self.make_client = make_client
+        self.table = table
+        self.player_id = f"bot{table}_{seat}"
+        self.args = args
+        self.stats = stats
+        self.deadline = deadline
+        self.rng = random.Random(args.seed * 100003 + table * 101 + seat)
+        self.latencies = {}
+        self.errors = {}
+        self.round = 0
+        self.client = None
+        self.state = {}
+
+    def room_id(self):
+        return f"{self.args.prefix}{self.table}r{self.round}"
+
+    def send(self, command_body, path=None):
+        command = command_body.split(None, 1)[0]
+        started = time.perf_counter()
+        result = self.client.send_command(command_body, path)
+        self.latencies.setdefault(command, []).append(time.perf_counter() - started)
+        if result.get("status") not in ("OK", "NOT_MODIFIED"):
+            self.errors[command] = self.errors.get(command, 0) + 1
+        return result
+
+    def update(self, result):
+        if result.get("status") != "OK":
+            return
+        if result.get("delta"):
+            if result.get("base_version") != self.state.get("version"):
+                self.update(self.send(f"state {self.player_id}"))
+                return
+            result = apply_delta(self.state, result)
+        self.state = result
+
+    def join_round(self):
+        # meja baru per ronde; bot pertama yang sampai membuat room-nya (409 jika sudah ada)
+        if self.client is not None:
+            self.client.close()
+        self.client = self.make_client(self.player_id, self.room_id())
+        # pembuatan room tidak ikut diukur, bot lain di meja yang sama selalu mendapat 409
+        self.client.send_command(f"create {self.room_id()}", "/rooms")
+        self.state = {}
+        self.update(self.send(f"join {self.player_id}"))
+
+    def think(self):
+        if self.args.think > 0:
+            time.sleep(min(self.rng.expovariate(1 / self.args.think), self.args.think * 5))
+
+    def choose_actions(self):
+        # aksi satu giliran tanpa nama pemain, misalnya ["play 3 red", "uno"]
+        hand, playable = self.state.get("hand", []), self.state.get("playable", [])
+        actions = []
+        if playable:
+            index = self.rng.choice(playable)
+            action = f"play {index}"
+            if hand[index].startswith("black"):
+                action += " " + self.rng.choice(("red", "green", "blue", "yellow"))
+            actions.append(action)
+            # tinggal satu kartu: biasanya bot ingat menyatakan UNO
+            if len(hand) == 2 and self.rng.random() < 0.8:
+                actions.append("uno")
+        else:
+            actions.append("draw")
+        # sesekali menantang pemain lain yang tinggal satu kartu
+        for pid, status in self.state.get("player_statuses", {}).items():
+            if pid != self.player_id and status.get("on_uno") and self.rng.random() < 0.3:
+                actions.append(f"callout {pid}")
+                break
+        return actions
+
+    def take_turn(self):
+        self.think()
+        actions = self.choose_actions()
+        version = self.state.get('version', -1)
+        if self.args.batch:
+            # satu round trip: semua aksi + state terbaru
+            result = self.send(f"batch {self.player_id} {version}\n" + "\n".join(actions))
+            self.update(result.get("state", {}))
+            return
+        for action in actions:
+            name, _, args = action.partition(" ")
+            result = self.send(f"{name} {self.player_id} {args}".rstrip())
+            if result.get("status") != "OK":
+                break
+        self.update(self.send(f"state {self.player_id} {version}"))
+
+    def run(self):
+        try:
+            self.join_round()
+            while time.time() < self.deadline:
+                if self.state.get("status") != "OK":
+                    time.sleep(0.1)
+                    self.update(self.send(f"state {self.player_id}"))
+                elif self.state.get("winner"):
+                    self.round += 1
+                    self.join_round()
+                elif self.state.get("your_turn"):
+                    self.take_turn()
+                elif self.args.poll > 0:
+                    # perilaku client lama: polling state berkala
+                    time.sleep(self.args.poll)
+                    self.update(self.send(f"state {self.player_id} {self.state['version']}"))
+                else:
+                    timeout = min(LONG_POLL_TIMEOUT, max(0.0, self.deadline - time.time()))
+                    self.update(self.send(f"wait {self.player_id} {self.state['version']} {timeout:.1f}"))
+        finally:
+            self.client.close()
+            self.stats.merge(self.latencies, self.errors)
+
+def main():
+    parser = argparse.ArgumentParser(description="load generator UNO")
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=8889)
+    parser.add_argument('--inprocess', action='store_true', help="panggil HttpServer.proses langsung tanpa server TCP")
+    parser.add_argument('--tables', type=int, default=10, help="jumlah meja (room)")
+    parser.add_argument('--players', type=int, default=4, help="bot per meja")
+    parser.add_argument('--duration', type=float, default=30)
+    parser.add_argument('--think', type=float, default=0.5, help="rata-rata waktu berpikir bot (detik, eksponensial)")
+    parser.add_argument('--poll', type=float, default=0, help="polling state tiap N detik alih-alih long-poll wait")
+    parser.add_argument('--batch', action='store_true', help="kirim aksi satu giliran + state dalam satu request batch")
+    parser.add_argument('--binary', action='store_true', help="protokol biner application/x-uno (hanya lewat TCP)")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--prefix', default=None, help="awalan nama room (default: lg<waktu>)")
+    parser.add_argument('--json', metavar='FILE', help="simpan hasil sebagai baseline JSON")
+    args = parser.parse_args()
+    if args.prefix is None:
+        args.prefix = "lg{}t".format(int(time.time()) % 100000)
+
+    if args.inprocess:
+        from http import HttpServer
+        httpserver = HttpServer()
+        make_client = lambda player_id, room_id: InProcessClient(httpserver, player_id, room_id)
+    else:
+        make_client = lambda player_id, room_id: UnoClient(player_id, room_id, pool_size=1,
+                                                           timeout=LONG_POLL_TIMEOUT + 5, host=args.host, port=args.port,
+                                                           binary=args.binary)
+
+    stats = Stats()
+    started = time.time()
+    deadline = started + args.duration
+    bots = [Bot(make_client, table, seat, args, stats, deadline)
+            for table in range(args.tables) for seat in range(args.players)]
+    for bot in bots:
+        bot.start()
+    for bot in bots:
+        bot.join()
+    duration = time.time() - started
+
+    rows = stats.report(duration)
+    total = sum(row["count"] for row in rows)
+    print("{} bot, {} meja, {:.1f} s, {} request, {:.1f} req/s".format(
+        len(bots), args.tables, duration, total, total / duration))
+    print("{:<9}{:>8}{:>9}{:>8}{:>9}{:>9}{:>9}{:>9}".format("command", "count", "req/s", "error", "p50 ms", "p95 ms", "p99 ms", "max ms"))
+    for row in rows:
+        print("{command:<9}{count:>8}{rps:>9.1f}{errors:>8}{p50_ms:>9.2f}{p95_ms:>9.2f}{p99_ms:>9.2f}{max_ms:>9.2f}".format(**row))
+    if args.json:
+        with open(args.json, "w") as fp:
+            json.dump({"args": vars(args), "duration": duration, "total": total, "commands": rows}, fp, indent=2)
+
+if __name__ == "__main__":
+    main()
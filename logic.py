@@ -1,54 +1,328 @@
 # logic.py
+import functools
+import json
 import random
+import threading
+import metrics
+
+class GameEvent:
+    # event publik (tanpa isi kartu di tangan). JSON baru dibuat saat subscriber SSE pertama
+    # memintanya, lalu dipakai bersama; tanpa subscriber (hanya listener scheduler) tidak ada serialisasi
+    __slots__ = ('version', 'name', 'data', '_payload', '_sse_frame')
+
+    def __init__(self, version, name, data):
+        self.version = version
+        self.name = name
+        self.data = data
+        self._payload = None
+        self._sse_frame = None
+
+    @property
+    def payload(self):
+        if self._payload is None:
+            self._payload = json.dumps(dict(self.data, event=self.name, version=self.version))
+        return self._payload
+
+    def sse_frame(self):
+        if self._sse_frame is None:
+            self._sse_frame = f"id: {self.version}\nevent: {self.name}\ndata: {self.payload}\n\n".encode()
+        return self._sse_frame
+
+# Kartu disimpan sebagai integer kecil: id = warna * 16 + nilai.
+# Deck, tumpukan buang dan tangan pemain berupa bytearray; string seperti "red Draw Two"
+# hanya dipakai di batas JSON lewat CARD_NAMES / CARD_IDS.
+COLOR_NAMES = ("red", "green", "blue", "yellow", "black")
+VALUE_NAMES = ("0", "1", "2", "3", "4", "5", "6", "7", "8", "9", "Skip", "Reverse", "Draw Two", "Wild", "Wild Draw Four")
+BLACK = 4
+SKIP, REVERSE, DRAW_TWO, WILD, WILD_DRAW_FOUR = 10, 11, 12, 13, 14
+CARD_COUNT = len(COLOR_NAMES) * 16
+
+CARD_COLOR = bytes(card >> 4 for card in range(CARD_COUNT))
+CARD_VALUE = bytes(card & 15 for card in range(CARD_COUNT))
+CARD_NAMES = tuple(
+    f"{COLOR_NAMES[card >> 4]} {VALUE_NAMES[card & 15]}" if (card & 15) < len(VALUE_NAMES) else None
+    for card in range(CARD_COUNT)
+)
+CARD_IDS = {name: card for card, name in enumerate(CARD_NAMES) if name is not None}
+COLOR_IDS = {name: color for color, name in enumerate(COLOR_NAMES) if color != BLACK}
+# kartu wild yang sudah diberi warna kembali menjadi hitam saat dikocok ulang ke deck
+CARD_BASE = bytes(BLACK * 16 + (card & 15) if (card & 15) >= WILD else card for card in range(256))
+# MATCHES[top * CARD_COUNT + card] == 1 jika card boleh dimainkan di atas top
+MATCHES = bytes(
+    1 if (card >> 4) == BLACK or (card >> 4) == (top >> 4) or (card & 15) == (top & 15) else 0
+    for top in range(CARD_COUNT) for card in range(CARD_COUNT)
+)
+
+# 108 kartu sebelum dikocok: satu 0 dan dua 1-9/Skip/Reverse/Draw Two per warna, empat Wild dan Wild Draw Four
+FULL_DECK = bytes(
+    [color * 16 + value for color in range(4) for value in range(DRAW_TWO + 1)] +
+    [color * 16 + value for color in range(4) for value in range(DRAW_TWO + 1) if value != 0] +
+    [BLACK * 16 + value for value in (WILD, WILD_DRAW_FOUR) for _ in range(4)]
+)
+
+# aksi yang boleh dikirim dalam satu batch -> method Game
+BATCH_ACTIONS = {"play": "play_card", "draw": "draw_card", "uno": "declare_uno", "callout": "call_out_player"}
+
+def serialized(method):
+    # aksi yang mengubah state dijalankan bergantian lewat lock milik game itu sendiri,
+    # game (room) yang berbeda tetap bisa diproses paralel. aksi yang diterima (versi naik)
+    # diteruskan ke recorder (journal) masih di dalam lock, jadi urutannya sama dengan urutan aksi
+    @functools.wraps(method)
+    def wrapper(self, *args):
+        with self.lock:
+            version = self.version
+            result = method(self, *args)
+            if self.recorder is not None and self.version != version:
+                self.recorder(self, method.__name__, args)
+            return result
+    return wrapper
+
+class GameSnapshot:
+    # salinan state yang tidak diubah lagi setelah dibuat; pembaca cukup mengambil
+    # referensi game.snapshot tanpa menunggu lock
+    __slots__ = ('version', 'public', 'hands', 'playable')
+
+    def __init__(self, version, public, hands, playable):
+        self.version = version
+        self.public = public
+        self.hands = hands
+        self.playable = playable
+
+def card_names(cards):
+    return [CARD_NAMES[card] for card in cards]
+
+def diff_hand(old_hand, new_hand):
+    # tangan hanya berubah lewat hapus (main kartu) dan tambah di belakang (tarik kartu),
+    # jadi cukup cocokkan berurutan: yang tidak cocok dihapus, sisa kartu baru ditambahkan
+    removed, j = [], 0
+    for i, card in enumerate(old_hand):
+        if j < len(new_hand) and new_hand[j] == card:
+            j += 1
+        else:
+            removed.append(i)
+    return removed, new_hand[j:]
 
 class Game:
-    def __init__(self):
+    def __init__(self, seed=None):
+        # semua kartu dikocok dari RNG milik game, seed yang sama + aksi yang sama = game yang sama
+        self.seed = seed if seed is not None else random.getrandbits(63)
+        self.rng = random.Random(self.seed)
+        # panjang setiap kocokan; RNG hanya dipakai untuk shuffle, jadi seed + daftar ini cukup
+        # untuk membangun ulang state RNG tanpa menyimpan state Mersenne Twister (±8 KB) di snapshot
+        self.shuffles = []
+        self.recorder = None
         self.players = {}
         self.turn_order = []
         self.current_turn_index = 0
         self.direction = 1
         self.deck = self._create_deck()
-        self.discard_pile = []
+        self.discard_pile = bytearray()
         self.winner = None
         self.last_action_message = ""
         self.players_on_uno = set()
         self.safe_from_call_out = set()
+        # versi naik setiap kali state berubah, dipakai client untuk long-polling
+        self.version = 0
+        self.lock = threading.RLock()
+        self.changed = threading.Condition()
+        self.listeners = []
+        self.pending_events = []
+        # selama run_batch, _touch hanya dicatat dan baru dijalankan sekali di akhir batch
+        self.in_batch = False
+        self.batch_touched = False
+        # state terakhir yang dikirim ke tiap pemain, dasar untuk balasan delta
+        self.sent_states = {}
+        # player_id -> (kartu teratas saat dihitung, index kartu yang boleh dimainkan)
+        self.playable = {}
         self._start_game_setup()
+        self.snapshot = self._make_snapshot()
+
+    def _event(self, name, **data):
+        self.pending_events.append((name, data))
+
+    def _touch(self):
+        # satu aksi = satu versi, event yang terkumpul selama aksi dikirim bersamaan.
+        # dipanggil di dalam lock game; snapshot baru dipasang sebelum penunggu dibangunkan
+        if self.in_batch:
+            self.batch_touched = True
+            return
+        with self.changed:
+            self.version += 1
+            self.snapshot = self._make_snapshot()
+            self.changed.notify_all()
+        events = [GameEvent(self.version, name, data) for name, data in self.pending_events]
+        self.pending_events = []
+        for listener in list(self.listeners):
+            listener(self.version, events)
+
+    def _make_snapshot(self):
+        public = {
+            "version": self.version,
+            "top_card": CARD_NAMES[self.discard_pile[-1]] if self.discard_pile else "",
+            "current_turn": self._get_current_player_id(),
+            "winner": self.winner,
+            "last_action_message": self.last_action_message,
+            "player_statuses": self._get_player_statuses()
+        }
+        hands = {pid: tuple(card_names(data["hand"])) for pid, data in self.players.items()}
+        playable = {pid: tuple(self.get_playable_indices(pid)) for pid in self.players}
+        return GameSnapshot(self.version, public, hands, playable)
+
+    def to_dict(self):
+        # snapshot ringkas untuk journal: kartu sebagai hex dari bytearray, RNG cukup seed + panjang kocokan
+        return {
+            "seed": self.seed,
+            "version": self.version,
+            "players": [[pid, data["hand"].hex(), data["uno_declared"]] for pid, data in self.players.items()],
+            "turn_order": self.turn_order,
+            "current_turn_index": self.current_turn_index,
+            "direction": self.direction,
+            "deck": self.deck.hex(),
+            "discard_pile": self.discard_pile.hex(),
+            "winner": self.winner,
+            "last_action_message": self.last_action_message,
+            "players_on_uno": sorted(self.players_on_uno),
+            "safe_from_call_out": sorted(self.safe_from_call_out),
+            "shuffles": self.shuffles
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        game = cls(data["seed"])
+        game._load(data)
+        game.snapshot = game._make_snapshot()
+        return game
+
+    def _load(self, data):
+        self.version = data["version"]
+        self.players = {pid: {"hand": bytearray.fromhex(hand), "uno_declared": uno_declared}
+                        for pid, hand, uno_declared in data["players"]}
+        self.turn_order = list(data["turn_order"])
+        self.current_turn_index = data["current_turn_index"]
+        self.direction = data["direction"]
+        self.deck = bytearray.fromhex(data["deck"])
+        self.discard_pile = bytearray.fromhex(data["discard_pile"])
+        self.winner = data["winner"]
+        self.last_action_message = data["last_action_message"]
+        self.players_on_uno = set(data["players_on_uno"])
+        self.safe_from_call_out = set(data["safe_from_call_out"])
+        # kocokan diulang pada data kosong dengan panjang yang sama: RNG maju persis seperti aslinya.
+        # seed sama, jadi jika kocokan game ini awalan dari data cukup sisanya yang diulang
+        shuffles = data["shuffles"]
+        if self.shuffles != shuffles[:len(self.shuffles)]:
+            self.rng = random.Random(self.seed)
+            self.shuffles = []
+        for length in shuffles[len(self.shuffles):]:
+            self.rng.shuffle(bytearray(length))
+        self.shuffles = list(shuffles)
+        self.playable = {}
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def remove_listener(self, listener):
+        if listener in self.listeners:
+            self.listeners.remove(listener)
+
+    def wait_for_change(self, known_version, timeout):
+        with self.changed:
+            self.changed.wait_for(lambda: self.version != known_version, timeout)
+        return self.version
 
     def _create_deck(self):
-        colors = ["red", "green", "blue", "yellow"]
-        values = ["0", "1", "2", "3", "4", "5", "6", "7", "8", "9", "Skip", "Reverse", "Draw Two"]
-        special = ["Wild", "Wild Draw Four"]
-        deck = [f"{color} {value}" for color in colors for value in values]
-        deck += [f"{color} {v}" for color in colors for v in values if v != '0']
-        deck += [f"black {s}" for s in special for _ in range(4)]
-        random.shuffle(deck)
+        deck = bytearray(FULL_DECK)
+        self._shuffle(deck)
         return deck
 
+    def _shuffle(self, cards):
+        self.shuffles.append(len(cards))
+        self.rng.shuffle(cards)
+
     def _draw_card_from_deck(self):
         if not self.deck:
             if len(self.discard_pile) > 1:
-                self.deck = self.discard_pile[:-1]
-                random.shuffle(self.deck)
+                self.deck = self.discard_pile[:-1].translate(CARD_BASE)
+                self._shuffle(self.deck)
                 self.discard_pile = self.discard_pile[-1:]
+                metrics.inc("uno_deck_reshuffles_total")
             else:
-                return "empty_deck"
+                return None
         return self.deck.pop()
 
+    def _draw_cards(self, count):
+        cards = bytearray()
+        for _ in range(count):
+            card = self._draw_card_from_deck()
+            if card is None: break
+            cards.append(card)
+        return cards
+
     def _start_game_setup(self):
         first_card = self._draw_card_from_deck()
-        while "black" in first_card or any(action in first_card for action in ["Skip", "Reverse", "Draw"]):
+        # kartu pertama harus kartu angka (bukan aksi / wild)
+        while CARD_VALUE[first_card] >= SKIP:
             self.deck.append(first_card)
-            random.shuffle(self.deck)
+            self._shuffle(self.deck)
             first_card = self._draw_card_from_deck()
         self.discard_pile.append(first_card)
 
+    @serialized
     def add_player(self, player_id):
         if player_id not in self.players:
-            hand = [self._draw_card_from_deck() for _ in range(7)]
+            hand = self._draw_cards(7)
             self.players[player_id] = {"hand": hand, "uno_declared": False}
             self.turn_order.append(player_id)
             self.last_action_message = f"{player_id} telah bergabung."
+            self._event("player_joined", player=player_id, count=len(hand))
+            self._touch()
+
+    @serialized
+    def remove_player(self, player_id):
+        # pemain yang keluar: kartunya kembali ke bawah deck, giliran pindah jika gilirannya sedang berjalan
+        if player_id not in self.players:
+            return
+        index = self.turn_order.index(player_id)
+        was_current = index == self.current_turn_index
+        self.deck[:0] = self.players.pop(player_id)["hand"]
+        del self.turn_order[index]
+        if index < self.current_turn_index or (was_current and self.direction == -1):
+            self.current_turn_index -= 1
+        self.current_turn_index = self.current_turn_index % len(self.turn_order) if self.turn_order else 0
+        self.players_on_uno.discard(player_id)
+        self.safe_from_call_out.discard(player_id)
+        self.playable.pop(player_id, None)
+        self.sent_states.pop(player_id, None)
+        self.last_action_message = f"{player_id} keluar dari permainan."
+        self._event("player_left", player=player_id)
+        if was_current:
+            self._event("turn_advanced", current_turn=self._get_current_player_id(), direction=self.direction)
+        self._touch()
+
+    def _give_cards(self, player_id, cards):
+        hand = self.players[player_id]["hand"]
+        cached = self.playable.get(player_id)
+        if cached is not None:
+            if cached[0] == self.discard_pile[-1]:
+                # cache masih berlaku, cukup periksa kartu yang baru masuk
+                row = cached[0] * CARD_COUNT
+                cached[1].extend(len(hand) + i for i, card in enumerate(cards) if MATCHES[row + card])
+            else:
+                del self.playable[player_id]
+        hand += cards
+
+    @serialized
+    def get_playable_indices(self, player_id):
+        if player_id not in self.players or not self.discard_pile:
+            return []
+        top = self.discard_pile[-1]
+        cached = self.playable.get(player_id)
+        if cached is None or cached[0] != top:
+            # kartu teratas berubah, hitung ulang dari tabel MATCHES
+            row = top * CARD_COUNT
+            hand = self.players[player_id]["hand"]
+            cached = (top, [i for i, card in enumerate(hand) if MATCHES[row + card]])
+            self.playable[player_id] = cached
+        return cached[1]
 
     def has_player(self, player_id):
         return player_id in self.players
@@ -63,20 +337,54 @@ class Game:
             statuses[pid] = {"count": len(data["hand"]), "on_uno": is_on_uno_vulnerable}
         return statuses
 
+    def get_public_state(self):
+        return dict(self.snapshot.public)
+
     def get_full_game_state(self, player_id):
-        if not self.has_player(player_id):
+        # dibaca dari snapshot: tidak pernah menunggu aksi pemain lain yang sedang diproses
+        snapshot = self.snapshot
+        hand = snapshot.hands.get(player_id)
+        if hand is None:
             return {"status": "ERROR", "message": "Player not found"}
+        public = snapshot.public
         return {
             "status": "OK",
-            "hand": self.players[player_id]["hand"],
-            "top_card": self.discard_pile[-1] if self.discard_pile else "",
-            "your_turn": self._get_current_player_id() == player_id,
-            "current_turn": self._get_current_player_id(),
-            "winner": self.winner,
-            "last_action_message": self.last_action_message,
-            "player_statuses": self._get_player_statuses()
+            "version": snapshot.version,
+            "hand": hand,
+            "playable": list(snapshot.playable[player_id]),
+            "top_card": public["top_card"],
+            "your_turn": public["current_turn"] == player_id,
+            "current_turn": public["current_turn"],
+            "winner": public["winner"],
+            "last_action_message": public["last_action_message"],
+            "player_statuses": public["player_statuses"]
         }
 
+    def get_state_delta(self, player_id, known_version):
+        state = self.get_full_game_state(player_id)
+        if state["status"] != "OK":
+            return state
+        prev = self.sent_states.get(player_id)
+        self.sent_states[player_id] = state
+        if prev is None or prev["version"] != known_version:
+            return state
+        if known_version == state["version"]:
+            return {"status": "NOT_MODIFIED", "version": known_version}
+
+        delta = {"status": "OK", "delta": True, "base_version": known_version, "version": state["version"]}
+        for key in ("top_card", "your_turn", "current_turn", "winner", "last_action_message", "playable"):
+            if state[key] != prev[key]:
+                delta[key] = state[key]
+        removed, added = diff_hand(prev["hand"], state["hand"])
+        if removed: delta["hand_removed"] = removed
+        if added: delta["hand_added"] = added
+        statuses, prev_statuses = state["player_statuses"], prev["player_statuses"]
+        changed = {pid: st for pid, st in statuses.items() if prev_statuses.get(pid) != st}
+        if changed: delta["player_statuses"] = changed
+        gone = [pid for pid in prev_statuses if pid not in statuses]
+        if gone: delta["players_removed"] = gone
+        return delta
+
     def _update_player_uno_status(self, player_id):
         hand_size = len(self.players[player_id]["hand"])
         if hand_size == 1:
@@ -84,26 +392,35 @@ class Game:
         else:
             self.players_on_uno.discard(player_id)
 
+    @serialized
     def declare_uno(self, player_id):
         if len(self.players[player_id]["hand"]) == 1:
             self.players[player_id]["uno_declared"] = True
             self.last_action_message = f"{player_id} menyatakan UNO!"
+            self._event("uno_declared", player=player_id, valid=True)
+            self._touch()
             return {"status": "OK"}
         else:
-            self.players[player_id]["hand"].append(self._draw_card_from_deck())
+            self._give_cards(player_id, self._draw_cards(1))
             self.last_action_message = f"{player_id} salah menyatakan UNO, +1 kartu!"
+            self._event("uno_declared", player=player_id, valid=False, count=len(self.players[player_id]["hand"]))
+            self._touch()
             return {"status": "ERROR", "message": "Pinalti salah UNO!"}
 
+    @serialized
     def call_out_player(self, caller_id, target_id):
         target_data = self.players.get(target_id)
         if target_data and len(target_data["hand"]) == 1 and not target_data["uno_declared"]:
-            target_data["hand"] += [self._draw_card_from_deck() for _ in range(2)]
+            self._give_cards(target_id, self._draw_cards(2))
             self.last_action_message = f"{caller_id} menantang {target_id}! {target_id} menarik 2 kartu."
             self._update_player_uno_status(target_id)
+            self._event("callout", caller=caller_id, target=target_id, success=True, count=len(target_data["hand"]))
         else:
-            self.players[caller_id]["hand"].append(self._draw_card_from_deck())
+            self._give_cards(caller_id, self._draw_cards(1))
             self.last_action_message = f"Tantangan {caller_id} pada {target_id} gagal, +1 kartu!"
             self._update_player_uno_status(caller_id)
+            self._event("callout", caller=caller_id, target=target_id, success=False, count=len(self.players[caller_id]["hand"]))
+        self._touch()
         return {"status": "OK"}
 
     def _advance_turn(self):
@@ -117,65 +434,113 @@ class Game:
 
     def _apply_card_effects(self, played_val, new_color=None):
         skip_turn = False
-        if played_val == "Skip":
+        if played_val == SKIP:
             skip_turn = True
-        elif played_val == "Reverse":
+        elif played_val == REVERSE:
             if len(self.players) == 2: skip_turn = True
             else: self.direction *= -1
-        elif played_val == "Draw Two":
+        elif played_val == DRAW_TWO:
             next_player_idx = (self.current_turn_index + self.direction) % len(self.turn_order)
             next_player = self.turn_order[next_player_idx]
-            self.players[next_player]["hand"] += [self._draw_card_from_deck() for _ in range(2)]
+            self._give_cards(next_player, self._draw_cards(2))
             self._update_player_uno_status(next_player)
+            self._event("card_drawn", player=next_player, drawn=2, count=len(self.players[next_player]["hand"]))
             skip_turn = True
-        elif played_val == "Wild Draw Four":
+        elif played_val == WILD_DRAW_FOUR:
             next_player_idx = (self.current_turn_index + self.direction) % len(self.turn_order)
             next_player = self.turn_order[next_player_idx]
-            self.players[next_player]["hand"] += [self._draw_card_from_deck() for _ in range(4)]
+            self._give_cards(next_player, self._draw_cards(4))
             self._update_player_uno_status(next_player)
+            self._event("card_drawn", player=next_player, drawn=4, count=len(self.players[next_player]["hand"]))
             skip_turn = True
         
         self._advance_turn()
         if skip_turn:
             self._advance_turn()
+        self._event("turn_advanced", current_turn=self._get_current_player_id(), direction=self.direction)
 
+    @serialized
     def play_card(self, player_id, index, new_color=None):
         if self.winner or self._get_current_player_id() != player_id: return {"status": "ERROR", "message":"Bukan giliranmu"}
         hand = self.players[player_id]["hand"]
-        if index >= len(hand): return {"status": "ERROR", "message":"Index kartu tidak valid"}
+        if not 0 <= index < len(hand): return {"status": "ERROR", "message":"Index kartu tidak valid"}
         
-        played_str, top_str = hand[index], self.discard_pile[-1]
-        played_color, played_val = played_str.split(" ", 1)
-        top_color, top_val = top_str.split(" ", 1)
-        is_match = (played_color == "black") or (played_color == top_color) or (played_val == top_val)
+        played = hand[index]
+        if not MATCHES[self.discard_pile[-1] * CARD_COUNT + played]: return {"status": "ERROR", "message":"Kartu tidak cocok"}
 
-        if not is_match: return {"status": "ERROR", "message":"Kartu tidak cocok"}
-        
-        del hand[index]
-        card_to_discard = played_str
-        if played_color == "black":
+        played_val = CARD_VALUE[played]
+        card_to_discard = played
+        if CARD_COLOR[played] == BLACK:
             if not new_color: return {"status": "ERROR", "message":"Harus pilih warna"}
-            card_to_discard = f"{new_color} {played_val}"
+            if new_color not in COLOR_IDS: return {"status": "ERROR", "message":"Warna tidak valid"}
+            card_to_discard = COLOR_IDS[new_color] * 16 + played_val
 
+        del hand[index]
+        self.playable.pop(player_id, None)
         self.discard_pile.append(card_to_discard)
-        self.last_action_message = f"{player_id} memainkan {played_str}."
+        self.last_action_message = f"{player_id} memainkan {CARD_NAMES[played]}."
         
         self._update_player_uno_status(player_id)
+        self._event("card_played", player=player_id, card=CARD_NAMES[card_to_discard], count=len(hand))
 
         if not hand:
             self.winner = player_id
             self.last_action_message = f"🎉 {player_id} MENANG! 🎉"
+            self._event("winner", player=player_id)
         else:
             self._apply_card_effects(played_val, new_color)
 
+        self._touch()
         return {"status": "OK"}
 
+    @serialized
     def draw_card(self, player_id):
         if self.winner or self._get_current_player_id() != player_id: return {"status": "ERROR", "message":"Bukan giliranmu"}
         card = self._draw_card_from_deck()
-        if card:
-            self.players[player_id]["hand"].append(card)
+        if card is not None:
+            self._give_cards(player_id, bytearray((card,)))
             self.last_action_message = f"{player_id} menarik kartu."
             self._update_player_uno_status(player_id)
+            self._event("card_drawn", player=player_id, drawn=1, count=len(self.players[player_id]["hand"]))
         self._advance_turn()
-        return {"status": "OK"}
\ No newline at end of file
+        self._event("turn_advanced", current_turn=self._get_current_player_id(), direction=self.direction)
+        self._touch()
+        return {"status": "OK"}
+
+    @serialized
+    def run_batch(self, player_id, commands):
+        # beberapa aksi satu pemain sebagai satu perubahan: commands = [[aksi, [argumen...]], ...].
+        # semua aksi berhasil -> satu versi baru dan satu record journal. aksi yang ditolak tanpa
+        # mengubah state -> state dikembalikan ke sebelum batch (termasuk RNG). aksi yang ditolak
+        # dengan pinalti (uno salah) -> pinalti tetap berlaku, aksi sebelumnya ikut disimpan
+        saved = self.to_dict()
+        results = []
+        penalty = False
+        self.in_batch, self.batch_touched = True, False
+        try:
+            for action, args in commands:
+                touched, self.batch_touched = self.batch_touched, False
+                result = getattr(self, BATCH_ACTIONS[action])(player_id, *args)
+                results.append(result)
+                if result["status"] != "OK":
+                    penalty = self.batch_touched
+                    break
+                self.batch_touched = self.batch_touched or touched
+        except Exception:
+            self.in_batch = False
+            self._rollback(saved)
+            raise
+        self.in_batch = False
+        if results and results[-1]["status"] != "OK":
+            if penalty:
+                self._touch()
+            else:
+                self._rollback(saved)
+            return {"status": "ERROR", "message": results[-1]["message"], "failed": len(results) - 1, "results": results}
+        if self.batch_touched:
+            self._touch()
+        return {"status": "OK", "results": results}
+
+    def _rollback(self, saved):
+        self._load(saved)
+        self.pending_events = []
@@ -0,0 +1,165 @@
+# metrics.py
+# Metrik runtime dalam format teks Prometheus, dibuat sendiri oleh server (GET /metrics).
+# Setiap thread menulis ke shard miliknya sendiri (threading.local), jadi hot path hanya
+# menambah angka di dict lokal tanpa lock; shard baru dijumlahkan saat /metrics diminta.
+import bisect
+import threading
+
+# label command hanya dari daftar ini; kata lain dari body client digabung ke "other"
+# agar client tidak bisa membuat seri histogram baru tanpa batas
+COMMANDS = frozenset(("state", "join", "wait", "play", "draw", "uno", "callout", "batch"))
+# label method juga dibatasi karena nilainya berasal langsung dari baris request client
+METHODS = frozenset(("GET", "POST", "HEAD"))
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+# nama -> (tipe, keterangan)
+METRICS = {
+    "uno_command_duration_seconds": ("histogram", "Latency perintah POST /uno per command, dari request lengkap sampai balasan terkirim"),
+    "uno_http_responses_total": ("counter", "Jumlah balasan HTTP per method dan status"),
+    "uno_connections_total": ("counter", "Jumlah koneksi TCP yang diterima"),
+    "uno_connections_active": ("gauge", "Koneksi TCP yang sedang terbuka"),
+    "uno_connections_rejected_total": ("counter", "Koneksi yang ditolak dengan 503 karena antrian worker penuh atau terlalu lama menunggu worker"),
+    "uno_workers_busy": ("gauge", "Worker engine thread yang sedang memproses request"),
+    "uno_bytes_received_total": ("counter", "Byte request yang diterima dari client"),
+    "uno_bytes_sent_total": ("counter", "Byte balasan yang dikirim ke client"),
+    "uno_deck_reshuffles_total": ("counter", "Berapa kali tumpukan buang dikocok ulang menjadi deck"),
+    "uno_turn_timeouts_total": ("counter", "Giliran yang habis waktu sehingga pemain otomatis menarik kartu"),
+    "uno_players_evicted_total": ("counter", "Pemain yang dikeluarkan karena berhenti mengirim request"),
+    "uno_rooms_expired_total": ("counter", "Room yang ditutup scheduler, per alasan"),
+    "uno_threads": ("gauge", "Thread Python yang hidup"),
+    "uno_asyncio_tasks": ("gauge", "Task asyncio yang hidup (engine async)"),
+    "uno_games_active": ("gauge", "Room yang terbuka"),
+    "uno_games_finished": ("gauge", "Room yang sudah punya pemenang"),
+    "uno_players": ("gauge", "Pemain di semua room"),
+}
+
+class Shard:
+    __slots__ = ('counters', 'histograms')
+
+    def __init__(self):
+        # (nama, labels) -> angka
+        self.counters = {}
+        # (nama, labels) -> [jumlah per bucket..., +Inf, total nilai]
+        self.histograms = {}
+
+_local = threading.local()
+_shards = []
+_shards_lock = threading.Lock()
+_gauges = {}
+
+def _shard():
+    shard = getattr(_local, 'shard', None)
+    if shard is None:
+        # lock hanya diambil sekali per thread, saat shard-nya didaftarkan
+        shard = Shard()
+        with _shards_lock:
+            _shards.append(shard)
+        _local.shard = shard
+    return shard
+
+def inc(name, value=1, labels=()):
+    counters = _shard().counters
+    key = (name, labels)
+    counters[key] = counters.get(key, 0) + value
+
+def observe(name, value, labels=()):
+    histograms = _shard().histograms
+    key = (name, labels)
+    buckets = histograms.get(key)
+    if buckets is None:
+        buckets = histograms[key] = [0] * (len(LATENCY_BUCKETS) + 2)
+    buckets[bisect.bisect_left(LATENCY_BUCKETS, value)] += 1
+    buckets[-1] += value
+
+def register_gauge(name, callback):
+    # callback dipanggil saat /metrics diminta, mengembalikan angka atau list (labels, angka)
+    _gauges[name] = callback
+
+def observe_request(request, kode, nbytes, latency):
+    method = request.method if request.method in METHODS else "other"
+    inc("uno_http_responses_total", 1, (("method", method), ("status", str(kode))))
+    inc("uno_bytes_sent_total", nbytes)
+    if request.command is not None and request.path.startswith("/uno"):
+        command = request.command if request.command in COMMANDS else "other"
+        observe("uno_command_duration_seconds", latency, (("command", command),))
+
+def _labels(labels, extra=()):
+    labels = tuple(labels) + tuple(extra)
+    if not labels:
+        return ""
+    return "{" + ",".join('{}="{}"'.format(k, str(v).replace('\\', '\\\\').replace('"', '\\"')) for k, v in labels) + "}"
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value)
+    return str(value)
+
+def collect():
+    counters = {}
+    histograms = {}
+    with _shards_lock:
+        shards = list(_shards)
+    for shard in shards:
+        for key, value in list(shard.counters.items()):
+            counters[key] = counters.get(key, 0) + value
+        for key, buckets in list(shard.histograms.items()):
+            total = histograms.get(key)
+            if total is None:
+                histograms[key] = list(buckets)
+            else:
+                histograms[key] = [a + b for a, b in zip(total, buckets)]
+    for name, callback in list(_gauges.items()):
+        value = callback()
+        if isinstance(value, list):
+            for labels, item in value:
+                counters[(name, labels)] = item
+        else:
+            counters[(name, ())] = value
+    return counters, histograms
+
+def merge(texts):
+    # gabungkan hasil render() beberapa proses (mode prefork): seri dengan nama dan label
+    # yang sama dijumlahkan, termasuk bucket histogram dan gauge (total semua worker)
+    blocks = {}
+    for text in texts:
+        series = None
+        for line in text.splitlines():
+            if line.startswith("#"):
+                name = line.split(None, 3)[2]
+                if name not in blocks:
+                    blocks[name] = ([], {})
+                header, series = blocks[name]
+                if line not in header:
+                    header.append(line)
+            elif line and series is not None:
+                key, value = line.rsplit(" ", 1)
+                value = float(value) if "." in value or "e" in value else int(value)
+                series[key] = series.get(key, 0) + value
+    lines = []
+    for header, series in blocks.values():
+        lines += header
+        lines += ["{} {}".format(key, _format_value(value)) for key, value in series.items()]
+    return "\n".join(lines) + "\n"
+
+def render():
+    counters, histograms = collect()
+    lines = []
+    for name, (kind, description) in METRICS.items():
+        series = [(labels, value) for (metric, labels), value in counters.items() if metric == name]
+        hist = [(labels, buckets) for (metric, labels), buckets in histograms.items() if metric == name]
+        if not series and not hist:
+            continue
+        lines.append("# HELP {} {}".format(name, description))
+        lines.append("# TYPE {} {}".format(name, kind))
+        for labels, value in sorted(series):
+            lines.append("{}{} {}".format(name, _labels(labels), _format_value(value)))
+        for labels, buckets in sorted(hist):
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS + ("+Inf",), buckets):
+                cumulative += count
+                lines.append("{}_bucket{} {}".format(name, _labels(labels, (("le", bound),)), cumulative))
+            lines.append("{}_sum{} {}".format(name, _labels(labels), repr(buckets[-1])))
+            lines.append("{}_count{} {}".format(name, _labels(labels), cumulative))
+    return "\n".join(lines) + "\n"
+
+register_gauge("uno_threads", threading.active_count)
@@ -0,0 +1,47 @@
+# replay.py
+# Bangun ulang game dari journal server (--journal DIR).
+#   python3 replay.py DIR                 ringkasan semua room
+#   python3 replay.py DIR --room ID       state publik + tangan setiap pemain di room ID
+#   python3 replay.py DIR --bench 20      jalankan ulang semua aksi 20 kali dan ukur kecepatan engine
+import argparse
+import json
+import time
+from journal import read_records, replay
+
+def main():
+    parser = argparse.ArgumentParser(description="replay journal UNO")
+    parser.add_argument('directory')
+    parser.add_argument('--room', help="tampilkan state lengkap satu room")
+    parser.add_argument('--bench', type=int, metavar='N', help="ulangi replay N kali dan cetak jumlah aksi per detik")
+    args = parser.parse_args()
+
+    records = list(read_records(args.directory))
+    games = replay(records)
+
+    if args.room:
+        game = games.get(args.room)
+        if game is None:
+            print("room {} tidak ada di journal".format(args.room))
+            return
+        state = game.get_public_state()
+        state["hands"] = {pid: list(hand) for pid, hand in game.snapshot.hands.items()}
+        print(json.dumps(state, indent=2, ensure_ascii=False))
+    else:
+        print("{} record, {} room".format(len(records), len(games)))
+        for room_id, game in sorted(games.items()):
+            state = game.get_public_state()
+            print("{:<32} versi {:<6} pemain {:<3} giliran {:<12} pemenang {}".format(
+                room_id, state["version"], len(game.players), str(state["current_turn"]), state["winner"]))
+
+    if args.bench:
+        # aksi produksi dijalankan ulang terhadap logic.Game sebagai benchmark regresi
+        actions = sum(1 for record in records if record["op"] not in ("create", "close", "snapshot"))
+        started = time.perf_counter()
+        for _ in range(args.bench):
+            replay(records)
+        elapsed = time.perf_counter() - started
+        print("{} aksi x {} putaran dalam {:.3f} s = {:.0f} aksi/s".format(
+            actions, args.bench, elapsed, actions * args.bench / elapsed if elapsed else 0))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+# rooms.py
+import functools
+import re
+import uuid
+import zlib
+from logic import Game
+
+DEFAULT_ROOM = "default"
+ROOM_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,32}$")
+
+def room_owner(room_id, count):
+    # mode prefork: room selalu dilayani proses worker yang sama
+    return zlib.crc32(room_id.encode('utf-8')) % count
+
+def request_room(request):
+    # room yang dituju request, None jika request tidak terikat room (file statis, /metrics, ...)
+    path = request.path.split('?', 1)[0]
+    for prefix in ("/uno", "/events"):
+        if path == prefix:
+            return DEFAULT_ROOM
+        if path.startswith(prefix + "/"):
+            return path[len(prefix) + 1:]
+    if path == "/rooms" and request.method == "POST":
+        parts = request.body.split()
+        if len(parts) > 1 and parts[0] in (b"create", b"close"):
+            return parts[1].decode('utf-8', errors='replace')
+    return None
+
+# header pada request yang dikirim dispatcher ke setiap worker (lihat is_cluster_wide)
+FANOUT_HEADER = "x-uno-fanout"
+
+def is_cluster_wide(request):
+    # request tanpa room yang jawabannya harus mencakup semua worker di mode prefork
+    path = request.path.split('?', 1)[0]
+    if request.method == "GET":
+        return path in ("/metrics", "/rooms")
+    if request.method == "POST":
+        return path == "/admin" or (path == "/rooms" and request.body.split()[:1] == [b"list"])
+    return False
+
+class RoomRegistry:
+    def __init__(self, journal=None, owns=None):
+        # room_id -> Game, lookup per request cukup satu akses dict (O(1))
+        self.rooms = {}
+        self.journal = journal
+        # owns(room_id) -> bool di mode prefork: id acak hanya dipilih dari room milik proses ini
+        self.owns = owns
+        # scheduler.Housekeeper jika batas waktu giliran / TTL room aktif
+        self.housekeeper = None
+        if journal is not None:
+            # room yang sedang berjalan sebelum server mati dibangun ulang dari journal
+            for room_id, game in journal.recover().items():
+                self._attach(room_id, game)
+                self.rooms[room_id] = game
+            journal.start(self)
+        if DEFAULT_ROOM not in self.rooms and (owns is None or owns(DEFAULT_ROOM)):
+            self.create(DEFAULT_ROOM)
+
+    def _attach(self, room_id, game):
+        if self.journal is not None:
+            game.recorder = functools.partial(self.journal.record, room_id)
+        if self.housekeeper is not None:
+            self.housekeeper.attach(room_id, game)
+
+    def is_valid_id(self, room_id):
+        return bool(ROOM_ID_PATTERN.match(room_id))
+
+    def create(self, room_id=None, seed=None):
+        if room_id is None:
+            room_id = uuid.uuid4().hex[:8]
+            while room_id in self.rooms or (self.owns is not None and not self.owns(room_id)):
+                room_id = uuid.uuid4().hex[:8]
+        if not self.is_valid_id(room_id) or room_id in self.rooms:
+            return None
+        game = Game(seed)
+        self._attach(room_id, game)
+        with game.lock:
+            self.rooms[room_id] = game
+            if self.journal is not None:
+                self.journal.record_room(room_id, "create", game)
+        return room_id
+
+    def get(self, room_id):
+        return self.rooms.get(room_id)
+
+    def close(self, room_id):
+        if room_id == DEFAULT_ROOM:
+            return False
+        game = self.rooms.get(room_id)
+        if game is None:
+            return False
+        with game.lock:
+            if self.rooms.get(room_id) is not game:
+                return False
+            del self.rooms[room_id]
+            if self.journal is not None:
+                self.journal.record_room(room_id, "close", game)
+        return True
+
+    def list_rooms(self):
+        return [
+            {"room": room_id, "players": len(game.players), "winner": game.winner}
+            for room_id, game in list(self.rooms.items())
+        ]
+
+    def __len__(self):
+        return len(self.rooms)
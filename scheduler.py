@@ -0,0 +1,189 @@
+# scheduler.py
+# Timer wheel untuk batas waktu giliran, pemain yang berhenti polling dan room yang
+# ditinggalkan / sudah selesai. Setiap tick hanya satu slot wheel yang diperiksa, jadi
+# biayanya tidak bergantung pada jumlah game; timer yang sudah tidak berlaku (versi game
+# sudah berubah, pemain masih aktif) tidak dihapus dari wheel tetapi diabaikan saat jatuh tempo.
+import functools
+import logging
+import math
+import threading
+import time
+import metrics
+
+TICK = 0.25
+
+class TimerWheel:
+    def __init__(self, max_delay, tick=TICK):
+        # jumlah slot cukup untuk delay terpanjang, sehingga timer tidak perlu berputar lebih dari sekali
+        self.tick = tick
+        self.slots = [[] for _ in range(1 << max(6, math.ceil(math.log2(max_delay / tick + 2))))]
+        self.mask = len(self.slots) - 1
+        self.current = 0
+        self.started = time.monotonic()
+        self.lock = threading.Lock()
+
+    def schedule(self, delay, callback, *args):
+        with self.lock:
+            target = self.current + max(1, math.ceil(delay / self.tick))
+            self.slots[target & self.mask].append((target, callback, args))
+
+    def advance(self, now):
+        # jalankan semua timer sampai tick untuk waktu now; callback dipanggil di luar lock
+        due_tick = int((now - self.started) / self.tick)
+        while True:
+            with self.lock:
+                if self.current >= due_tick:
+                    return
+                self.current += 1
+                slot = self.slots[self.current & self.mask]
+                due = [entry for entry in slot if entry[0] <= self.current]
+                if len(due) == len(slot):
+                    slot.clear()
+                else:
+                    slot[:] = [entry for entry in slot if entry[0] > self.current]
+            for target, callback, args in due:
+                try:
+                    callback(*args)
+                except Exception as e:
+                    logging.warning("scheduler: timer {} gagal: {}".format(getattr(callback, '__name__', callback), e))
+
+    def run(self, stopped):
+        while not stopped.wait(self.tick):
+            self.advance(time.monotonic())
+
+class Housekeeper:
+    # dipasang ke RoomRegistry: setiap room dipantau lewat listener game dan request pemain
+    #   turn_timeout : pemain yang tidak bergerak selama ini otomatis menarik kartu (giliran lewat)
+    #   idle_timeout : pemain yang tidak mengirim request apa pun selama ini dikeluarkan
+    #   game_ttl     : room tanpa aktivitas selama ini ditutup
+    #   finished_ttl : room yang sudah ada pemenangnya ditutup setelah ini
+    # nilai 0 mematikan fitur tersebut
+    def __init__(self, registry, turn_timeout=60, idle_timeout=120, game_ttl=1800, finished_ttl=300):
+        self.registry = registry
+        self.turn_timeout = turn_timeout
+        self.idle_timeout = idle_timeout
+        self.game_ttl = game_ttl
+        self.finished_ttl = finished_ttl
+        self.wheel = TimerWheel(max(turn_timeout, idle_timeout, game_ttl, finished_ttl, 1))
+        # game -> {player_id: waktu request terakhir}
+        self.last_seen = {}
+        # game -> waktu aktivitas terakhir / waktu game selesai
+        self.active_at = {}
+        self.finished_at = {}
+        # (game, player_id) yang sudah punya timer idle di wheel
+        self.idle_pending = set()
+        # (game, player_id) -> jumlah stream /events yang terbuka; pemain yang menonton tidak dianggap idle
+        self.watching = {}
+        self.watch_lock = threading.Lock()
+        self.stopped = threading.Event()
+        registry.housekeeper = self
+        for room_id, game in list(registry.rooms.items()):
+            self.attach(room_id, game)
+        self.thread = threading.Thread(target=self.wheel.run, args=(self.stopped,), name="housekeeper", daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+
+    def attach(self, room_id, game):
+        now = time.monotonic()
+        self.last_seen[game] = {}
+        self.active_at[game] = now
+        if game.winner:
+            self.finished_at[game] = now
+        game.add_listener(functools.partial(self.changed, game))
+        if self.game_ttl or self.finished_ttl:
+            self.wheel.schedule(self._ttl_delay(game, now), self.check_room, room_id, game)
+        self.changed(game, game.version, [])
+
+    def changed(self, game, version, events):
+        # listener game, dipanggil di dalam lock game setiap versi naik
+        now = time.monotonic()
+        self.active_at[game] = now
+        if game.winner and game not in self.finished_at:
+            self.finished_at[game] = now
+        if self.turn_timeout and not game.winner and len(game.turn_order) > 1:
+            self.wheel.schedule(self.turn_timeout, self.check_turn, game, version)
+
+    def seen(self, game, player_id):
+        # dipanggil HttpServer untuk setiap perintah pemain
+        now = time.monotonic()
+        players = self.last_seen.get(game)
+        if players is None:
+            return
+        players[player_id] = now
+        self.active_at[game] = now
+        key = (game, player_id)
+        if self.idle_timeout and key not in self.idle_pending:
+            self.idle_pending.add(key)
+            self.wheel.schedule(self.idle_timeout, self.check_player, game, player_id)
+
+    def watch(self, game, player_id, delta):
+        # dipanggil EventStream saat stream dibuka (+1) dan ditutup (-1)
+        key = (game, player_id)
+        with self.watch_lock:
+            count = self.watching.get(key, 0) + delta
+            if count > 0:
+                self.watching[key] = count
+            else:
+                self.watching.pop(key, None)
+        self.seen(game, player_id)
+
+    def check_turn(self, game, version):
+        with game.lock:
+            # masih di versi yang sama: tidak ada yang bergerak sejak timer dipasang
+            if game.version != version or game.winner or game not in self.last_seen:
+                return
+            player_id = game._get_current_player_id()
+            logging.info("scheduler: giliran {} habis, tarik kartu otomatis".format(player_id))
+            game.draw_card(player_id)
+            metrics.inc("uno_turn_timeouts_total")
+
+    def check_player(self, game, player_id):
+        players = self.last_seen.get(game)
+        key = (game, player_id)
+        if players is None or player_id not in players:
+            self.idle_pending.discard(key)
+            return
+        # HttpServer memanggil seen() di dalam lock game, jadi waktu request terakhir dibaca ulang
+        # di dalam lock yang sama sebelum pemain dikeluarkan
+        with game.lock:
+            remaining = players.get(player_id, 0) + self.idle_timeout - time.monotonic()
+            if remaining > 0 or key in self.watching:
+                # pemain masih aktif atau sedang menonton /events: timer dipasang ulang
+                self.wheel.schedule(remaining if remaining > 0 else self.idle_timeout, self.check_player, game, player_id)
+                return
+            self.idle_pending.discard(key)
+            players.pop(player_id, None)
+            if game.has_player(player_id):
+                logging.info("scheduler: {} tidak aktif, dikeluarkan".format(player_id))
+                game.remove_player(player_id)
+                metrics.inc("uno_players_evicted_total")
+
+    def _ttl_delay(self, game, now):
+        delays = []
+        if self.finished_ttl and game in self.finished_at:
+            delays.append(self.finished_at[game] + self.finished_ttl - now)
+        if self.game_ttl:
+            delays.append(self.active_at[game] + self.game_ttl - now)
+        return min(delays) if delays else self.finished_ttl
+
+    def check_room(self, room_id, game):
+        if self.registry.get(room_id) is not game:
+            self.forget(game)
+            return
+        now = time.monotonic()
+        delay = self._ttl_delay(game, now)
+        if delay > 0 or not self.registry.close(room_id):
+            # belum waktunya, atau room default yang tidak boleh ditutup
+            self.wheel.schedule(delay if delay > 0 else self.game_ttl or self.finished_ttl, self.check_room, room_id, game)
+            return
+        reason = "finished" if game.winner else "idle"
+        logging.info("scheduler: room {} ditutup ({})".format(room_id, reason))
+        metrics.inc("uno_rooms_expired_total", 1, (("reason", reason),))
+        self.forget(game)
+
+    def forget(self, game):
+        self.last_seen.pop(game, None)
+        self.active_at.pop(game, None)
+        self.finished_at.pop(game, None)
@@ -0,0 +1,205 @@
+import asyncio
+import collections
+import logging
+import socket
+import accesslog
+import metrics
+import time
+import tracing
+from http import HttpServer, LongPoll, EventStream, request_finished, EVENT_PING_INTERVAL, MAX_STREAM_BUFFER
+from httpparser import RequestParser, ParseError
+from staticfiles import FileResponse
+
+KEEPALIVE_TIMEOUT = 30
+
+class ProcessTheClientAsync(asyncio.Protocol):
+    def __init__(self, httpserver):
+        self.httpserver = httpserver
+        self.transport = None
+        self.idle_timer = None
+        self.pending = None
+        self.parser = RequestParser()
+        self.requests = collections.deque()
+
+    def connection_made(self, transport):
+        metrics.inc("uno_connections_total")
+        metrics.inc("uno_connections_active")
+        self.transport = transport
+        self._reset_idle_timer()
+
+    def _reset_idle_timer(self):
+        if self.idle_timer:
+            self.idle_timer.cancel()
+        loop = asyncio.get_running_loop()
+        self.idle_timer = loop.call_later(KEEPALIVE_TIMEOUT, self.transport.close)
+
+    def data_received(self, data):
+        metrics.inc("uno_bytes_received_total", len(data))
+        try:
+            parse_started = time.perf_counter()
+            requests = self.parser.feed(data)
+            parse_ended = time.perf_counter()
+        except ParseError as e:
+            self.transport.write(self.httpserver.error_response(e).to_bytes())
+            self.transport.close()
+            return
+        for request in requests:
+            tracing.begin(request, parse_started, parse_ended)
+        self.requests.extend(requests)
+        if self.pending is None:
+            self._reset_idle_timer()
+            self._process()
+
+    def _process(self):
+        while self.requests and self.transport is not None:
+            request = self.requests.popleft()
+            logging.debug("data dari client: %s %s %s", request.method, request.path, request.body)
+            hasil, keep_alive = self.httpserver.handle_request(request)
+            if isinstance(hasil, EventStream):
+                request_finished(request, 200, 0)
+                self._start_event_stream(hasil)
+                return
+            if isinstance(hasil, FileResponse):
+                self._start_sendfile(hasil, request)
+                return
+            if isinstance(hasil, LongPoll) and not hasil.ready():
+                # request berikutnya di koneksi ini menunggu sampai long-poll selesai
+                self._start_long_poll(hasil, request)
+                return
+            if isinstance(hasil, LongPoll):
+                hasil = hasil.render()
+            if not self._send(hasil, keep_alive, request):
+                return
+
+    def _send(self, hasil, keep_alive, request):
+        logging.debug("balas ke  client: %s %s", hasil.kode, hasil.body)
+        write_started = time.perf_counter()
+        buffers = hasil.buffers()
+        self.transport.writelines(buffers)
+        tracing.record(request, "write", write_started)
+        request_finished(request, hasil.kode, sum(len(b) for b in buffers))
+        if not keep_alive:
+            self.transport.close()
+            return False
+        return True
+
+    def _start_long_poll(self, long_poll, request):
+        loop = asyncio.get_running_loop()
+        self.pending = long_poll
+        if self.idle_timer:
+            self.idle_timer.cancel()
+        listener = lambda version, events: loop.call_soon_threadsafe(self._finish_long_poll, long_poll)
+        long_poll.listener = listener
+        long_poll.request = request
+        long_poll.game.add_listener(listener)
+        long_poll.timer = loop.call_later(long_poll.timeout, self._finish_long_poll, long_poll)
+
+    def _finish_long_poll(self, long_poll):
+        if self.pending is not long_poll:
+            return
+        self.pending = None
+        long_poll.timer.cancel()
+        long_poll.game.remove_listener(long_poll.listener)
+        if self.transport is None:
+            return
+        self._reset_idle_timer()
+        if self._send(long_poll.render(), long_poll.keep_alive, long_poll.request):
+            self._process()
+
+    def _start_sendfile(self, hasil, request):
+        self.pending = hasil
+        if self.idle_timer:
+            self.idle_timer.cancel()
+        asyncio.get_running_loop().create_task(self._sendfile(hasil, request))
+
+    async def _sendfile(self, hasil, request):
+        loop = asyncio.get_running_loop()
+        try:
+            write_started = time.perf_counter()
+            head = hasil.response.head()
+            self.transport.write(head)
+            with open(hasil.entry.path, 'rb') as fp:
+                terkirim = await loop.sendfile(self.transport, fp, hasil.offset, hasil.length)
+        except (OSError, RuntimeError) as e:
+            if self.transport is not None:
+                self.transport.close()
+            return
+        tracing.record(request, "write", write_started)
+        request_finished(request, hasil.response.kode, len(head) + terkirim)
+        if self.pending is not hasil or self.transport is None:
+            return
+        self.pending = None
+        if not hasil.keep_alive:
+            self.transport.close()
+            return
+        self._reset_idle_timer()
+        self._process()
+
+    def _start_event_stream(self, stream):
+        loop = asyncio.get_running_loop()
+        self.pending = stream
+        if self.idle_timer:
+            self.idle_timer.cancel()
+        self.transport.write(stream.head())
+        stream.attach(lambda version, events: loop.call_soon_threadsafe(self._write_events, stream.frames(events)))
+        stream.ping_timer = loop.call_later(EVENT_PING_INTERVAL, self._ping_event_stream)
+
+    def _write_events(self, frame):
+        if self.transport is None or self.transport.is_closing():
+            return
+        self.transport.write(frame)
+        if self.transport.get_write_buffer_size() > MAX_STREAM_BUFFER:
+            # pembaca terlalu lambat: abort (bukan close, yang menunggu buffer terkirim),
+            # connection_lost kemudian melepas listener game
+            self.transport.abort()
+
+    def _ping_event_stream(self):
+        if self.transport is None:
+            return
+        self._write_events(b": ping\n\n")
+        loop = asyncio.get_running_loop()
+        self.pending.ping_timer = loop.call_later(EVENT_PING_INTERVAL, self._ping_event_stream)
+
+    def connection_lost(self, exc):
+        metrics.inc("uno_connections_active", -1)
+        if self.idle_timer:
+            self.idle_timer.cancel()
+        if isinstance(self.pending, EventStream):
+            self.pending.ping_timer.cancel()
+            self.pending.detach()
+        elif isinstance(self.pending, LongPoll):
+            self.pending.timer.cancel()
+            self.pending.game.remove_listener(self.pending.listener)
+        self.pending = None
+        self.transport = None
+
+class AsyncServer:
+    def __init__(self, httpserver, host='0.0.0.0', port=8889, backlog=1024):
+        self.httpserver = httpserver
+        self.host = host
+        self.port = port
+        self.backlog = backlog
+
+    async def serve(self):
+        loop = asyncio.get_running_loop()
+        metrics.register_gauge("uno_asyncio_tasks", lambda: len(asyncio.all_tasks(loop)))
+        server = await loop.create_server(
+            lambda: ProcessTheClientAsync(self.httpserver),
+            self.host, self.port,
+            family=socket.AF_INET, reuse_address=True, backlog=self.backlog)
+        logging.warning("async server listening on {}:{}".format(self.host, self.port))
+        async with server:
+            await server.serve_forever()
+
+    def run(self):
+        # semua koneksi dilayani oleh satu event loop (selector) di satu thread
+        asyncio.run(self.serve())
+
+def main(httpserver=None, port=8889, backlog=1024, setup_logging=True):
+    if setup_logging:
+        accesslog.setup()
+    svr = AsyncServer(httpserver or HttpServer(), port=port, backlog=backlog)
+    svr.run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,275 @@
+# server_prefork.py
+# Mode multi-proses (python3 server_thread_http.py --processes N): satu proses dispatcher
+# menerima koneksi di port, membaca request pertama, lalu menyerahkan socket-nya (beserta
+# bytes yang sudah dibaca) ke proses worker pemilik room lewat socket.send_fds. Setiap room
+# hanya hidup di satu worker (rooms.room_owner), jadi tidak ada state game yang dibagi
+# antar proses dan setiap worker punya GIL sendiri. Worker yang mati dijalankan ulang.
+# /metrics, daftar room dan /admin tidak terikat room: dispatcher meneruskannya ke semua
+# worker (lewat socketpair yang juga dikirim dengan send_fds) lalu menggabungkan jawabannya.
+import itertools
+import json
+import logging
+import multiprocessing
+import os
+import selectors
+import socket
+import threading
+import time
+import accesslog
+import metrics
+import server_thread_http
+from http import HttpServer
+from httpparser import RequestParser, ParseError, MAX_HEADER_SIZE, MAX_BODY_SIZE
+from journal import Journal
+from rooms import room_owner, request_room, is_cluster_wide, FANOUT_HEADER
+
+ACCEPT_TIMEOUT = 10
+SUPERVISE_INTERVAL = 0.5
+RESTART_DELAY = 1.0
+# request pertama ditambah paling banyak satu recv berikutnya (pipelining)
+MAX_HANDOFF = MAX_HEADER_SIZE + MAX_BODY_SIZE + 65536
+# batas waktu menunggu semua worker menjawab request gabungan
+FANOUT_TIMEOUT = 5.0
+
+class WorkerServer(server_thread_http.Server):
+    # engine thread biasa, hanya saja koneksi datang dari dispatcher, bukan dari accept()
+    def __init__(self, channel, workers, max_queue):
+        server_thread_http.Server.__init__(self, workers=workers, max_queue=max_queue)
+        self.my_socket.close()
+        self.channel = channel
+
+    def run(self):
+        self.start_workers()
+        while True:
+            try:
+                initial, fds, flags, address = socket.recv_fds(self.channel, MAX_HANDOFF, 1)
+            except OSError:
+                break
+            if not fds:
+                # dispatcher sudah berhenti
+                break
+            connection = socket.socket(fileno=fds[0])
+            metrics.inc("uno_connections_total")
+            metrics.inc("uno_connections_active")
+            try:
+                self.enqueue(server_thread_http.Client(connection, connection.getpeername(), initial))
+            except OSError:
+                connection.close()
+                metrics.inc("uno_connections_active", -1)
+
+def worker_main(index, count, channel, args):
+    accesslog.setup(getattr(logging, args.log_level), args.access_log_sample)
+    journal = None
+    if args.journal:
+        # satu journal per worker; jumlah proses harus tetap sama agar room kembali ke pemiliknya
+        journal = Journal(os.path.join(args.journal, "worker-{}".format(index)), fsync=args.journal_fsync)
+    owns = lambda room_id: room_owner(room_id, count) == index
+    server_thread_http.httpserver = HttpServer(journal=journal, admin_token=args.admin_token, owns_room=owns,
+                                               housekeeping=server_thread_http.housekeeping_options(args),
+                                               profile_dir=args.profile_dir)
+    WorkerServer(channel, args.workers, args.max_queue).run()
+
+class Worker:
+    def __init__(self, index):
+        self.index = index
+        self.process = None
+        self.channel = None
+        self.started = 0
+
+class Dispatcher:
+    def __init__(self, args):
+        self.args = args
+        self.count = args.processes
+        # forkserver, bukan fork: dispatcher punya thread (QueueListener access log, fanout) yang bisa
+        # sedang memegang lock logging / queue saat fork. proses forkserver tidak punya thread lain,
+        # dan worker tidak mewarisi socket dispatcher sehingga tidak ada yang perlu ditutup
+        self.context = multiprocessing.get_context("forkserver")
+        self.workers = [Worker(index) for index in range(self.count)]
+        self.round_robin = itertools.cycle(range(self.count))
+        self.selector = selectors.DefaultSelector()
+        self.listener = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        self.listener.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+
+    def start_worker(self, worker):
+        if worker.channel is not None:
+            worker.channel.close()
+        # SOCK_SEQPACKET: satu sendmsg = satu pesan utuh (bytes awal + fd koneksi)
+        parent, child = socket.socketpair(socket.AF_UNIX, socket.SOCK_SEQPACKET)
+        worker.process = self.context.Process(target=worker_main, name="uno-worker-{}".format(worker.index),
+                                              args=(worker.index, self.count, child, self.args), daemon=True)
+        worker.process.start()
+        child.close()
+        worker.channel = parent
+        worker.started = time.monotonic()
+
+    def supervise(self):
+        for worker in self.workers:
+            if worker.process.is_alive():
+                continue
+            if time.monotonic() - worker.started < RESTART_DELAY:
+                # jangan restart terus-menerus jika worker langsung mati lagi
+                continue
+            logging.warning("worker {} (pid {}) berhenti dengan kode {}, dijalankan ulang".format(
+                worker.index, worker.process.pid, worker.process.exitcode))
+            worker.process.join()
+            self.start_worker(worker)
+
+    def run(self):
+        self.listener.bind(('0.0.0.0', self.args.port))
+        self.listener.listen(self.args.backlog)
+        self.listener.setblocking(False)
+        for worker in self.workers:
+            self.start_worker(worker)
+        self.selector.register(self.listener, selectors.EVENT_READ)
+        logging.warning("prefork: dispatcher pid {} dengan {} worker di port {}".format(os.getpid(), self.count, self.args.port))
+        last_check = time.monotonic()
+        while True:
+            for key, mask in self.selector.select(SUPERVISE_INTERVAL):
+                if key.fileobj is self.listener:
+                    self.accept()
+                else:
+                    self.read(key.fileobj, key.data)
+            now = time.monotonic()
+            if now - last_check >= SUPERVISE_INTERVAL:
+                last_check = now
+                self.supervise()
+                self.expire(now)
+
+    def accept(self):
+        while True:
+            try:
+                connection, address = self.listener.accept()
+            except BlockingIOError:
+                return
+            connection.setblocking(False)
+            # data = [parser, bytes yang sudah dibaca, waktu diterima]
+            self.selector.register(connection, selectors.EVENT_READ, [RequestParser(), bytearray(), time.monotonic()])
+
+    def read(self, connection, pending):
+        parser, received = pending[0], pending[1]
+        try:
+            data = connection.recv(65536)
+        except BlockingIOError:
+            return
+        except OSError:
+            data = b""
+        if not data:
+            self.drop(connection)
+            return
+        received += data
+        try:
+            requests = parser.feed(data)
+        except ParseError:
+            # worker mana pun akan membalas error yang sama
+            self.handoff(connection, next(self.round_robin), received)
+            return
+        if requests:
+            room_id = request_room(requests[0])
+            if room_id is None and is_cluster_wide(requests[0]):
+                # dikerjakan di thread sendiri agar loop dispatcher tidak ikut menunggu worker
+                self.selector.unregister(connection)
+                threading.Thread(target=self.fanout, args=(connection, requests[0]), daemon=True).start()
+                return
+            index = next(self.round_robin) if room_id is None else room_owner(room_id, self.count)
+            self.handoff(connection, index, received)
+
+    def handoff(self, connection, index, received):
+        self.selector.unregister(connection)
+        worker = self.workers[index]
+        try:
+            socket.send_fds(worker.channel, [bytes(received)], [connection.fileno()])
+        except OSError as e:
+            # worker sedang mati / dijalankan ulang
+            logging.warning("prefork: gagal menyerahkan koneksi ke worker {}: {}".format(index, e))
+            self.reply(connection, server_thread_http.httpserver.response(
+                503, 'Service Unavailable', 'Worker restarting', {'Retry-After': '1'}))
+        connection.close()
+
+    def reply(self, connection, response):
+        # balasan langsung dari dispatcher; koneksi selalu ditutup sesudahnya
+        try:
+            connection.setblocking(True)
+            connection.settimeout(1.0)
+            connection.sendall(response.to_bytes())
+        except OSError:
+            pass
+
+    def fanout(self, connection, request):
+        # request dikirim ke semua worker sekaligus sebagai koneksi socketpair, lalu dijawab gabungannya
+        data = fanout_request(request)
+        deadline = time.monotonic() + FANOUT_TIMEOUT
+        pending = []
+        for worker in self.workers:
+            ours, theirs = socket.socketpair(socket.AF_UNIX, socket.SOCK_STREAM)
+            try:
+                socket.send_fds(worker.channel, [data], [theirs.fileno()])
+                pending.append(ours)
+            except (OSError, AttributeError) as e:
+                logging.warning("prefork: worker {} tidak ikut menjawab {}: {}".format(worker.index, request.path, e))
+                ours.close()
+            finally:
+                theirs.close()
+        replies = []
+        for sock in pending:
+            try:
+                replies.append(read_reply(sock, deadline))
+            except (OSError, ValueError) as e:
+                logging.warning("prefork: jawaban worker untuk {} gagal dibaca: {}".format(request.path, e))
+            finally:
+                sock.close()
+        self.reply(connection, merge_replies(request, replies))
+        connection.close()
+
+    def drop(self, connection):
+        self.selector.unregister(connection)
+        connection.close()
+
+    def expire(self, now):
+        # koneksi yang tidak pernah mengirim request lengkap ditutup
+        for key in list(self.selector.get_map().values()):
+            if key.data is not None and now - key.data[2] > ACCEPT_TIMEOUT:
+                self.drop(key.fileobj)
+
+def fanout_request(request):
+    # Connection: close agar balasan worker cukup dibaca sampai EOF
+    head = ["{} {} HTTP/1.1".format(request.method, request.path), "Connection: close",
+            "{}: 1".format(FANOUT_HEADER), "Content-Length: {}".format(len(request.body))]
+    if 'x-admin-token' in request.headers:
+        head.append("X-Admin-Token: {}".format(request.headers['x-admin-token']))
+    return ("\r\n".join(head) + "\r\n\r\n").encode() + request.body
+
+def read_reply(sock, deadline):
+    chunks = []
+    while True:
+        sock.settimeout(max(0.01, deadline - time.monotonic()))
+        data = sock.recv(65536)
+        if not data:
+            break
+        chunks.append(data)
+    head, sep, body = b"".join(chunks).partition(b"\r\n\r\n")
+    if not sep:
+        raise ValueError("balasan worker tidak lengkap")
+    status = head.split(b"\r\n", 1)[0].decode('latin-1').split(" ", 2)
+    return int(status[1]), status[2] if len(status) > 2 else "", body
+
+def merge_replies(request, replies):
+    httpserver = server_thread_http.httpserver
+    if not replies:
+        return httpserver.response(503, 'Service Unavailable', 'No worker answered', {'Retry-After': '1'})
+    for kode, message, body in replies:
+        if kode != 200:
+            # token admin salah, perintah tidak dikenal, ...: semua worker menjawab sama
+            return httpserver.response(kode, message, body, {})
+    bodies = [body for kode, message, body in replies]
+    path = request.path.split('?', 1)[0]
+    if path == "/metrics":
+        text = metrics.merge(body.decode('utf-8') for body in bodies)
+        return httpserver.response(200, 'OK', text, {'Content-type': 'text/plain; version=0.0.4'})
+    results = [json.loads(body) for body in bodies]
+    if path == "/rooms":
+        return httpserver.json_response({"status": "OK", "rooms": [room for result in results for room in result["rooms"]]})
+    # /admin: jawaban tiap worker, urut sesuai nomor worker
+    return httpserver.json_response({"status": "OK", "workers": results})
+
+def main(args):
+    Dispatcher(args).run()
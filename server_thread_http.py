@@ -3,65 +3,457 @@ import socket
 import threading
 import time
 import sys
+import heapq
+import itertools
 import logging
-from http import HttpServer
+import argparse
+import selectors
+import accesslog
+import metrics
+import tracing
+import queue
+from http import HttpServer, LongPoll, EventStream, request_finished, EVENT_PING_INTERVAL, MAX_STREAM_BUFFER
+from journal import Journal, FSYNC_MODES
+from httpparser import RequestParser, ParseError
+from staticfiles import FileResponse
 
 httpserver = HttpServer()
+KEEPALIVE_TIMEOUT = 30
+#koneksi yang menunggu worker lebih lama dari ini dibalas 503
+QUEUE_TIMEOUT = 5
+SWEEP_INTERVAL = 1.0
 
-class ProcessTheClient(threading.Thread):
-	def __init__(self, connection, address):
+class Client:
+	#state satu koneksi; berpindah antara worker (sedang diproses) dan ConnectionParker (menunggu)
+	def __init__(self, connection, address, initial=b""):
 		self.connection = connection
 		self.address = address
-		threading.Thread.__init__(self)
+		#initial: bytes yang sudah dibaca dispatcher (mode prefork) sebelum koneksi diserahkan
+		self.initial = initial
+		self.readable = False
+		self.parser = RequestParser()
+		#request yang sudah lengkap tetapi belum diproses (pipelining)
+		self.requests = []
+		#(request, LongPoll) yang sedang menunggu perubahan state
+		self.long_poll = None
+		self.waiting = False
+		self.deadline = 0
+		#event stream: buffer byte yang belum terkirim
+		self.stream = None
+		self.outgoing = None
+		self.closed = False
+		self.lock = threading.Lock()
+
+class ProcessTheClient(threading.Thread):
+	#worker tetap: mengambil koneksi yang siap dari antrian dan memprosesnya selama ada request;
+	#koneksi yang diam, long-poll dan event stream dikembalikan ke ConnectionParker
+	def __init__(self, server):
+		self.server = server
+		self.antrian = server.antrian
+		self.connection = None
+		self.address = None
+		threading.Thread.__init__(self, daemon=True)
 
 	def run(self):
-		rcv=""
 		while True:
+			client, queued_at = self.antrian.get()
+			self.connection, self.address = client.connection, client.address
+			metrics.inc("uno_workers_busy")
+			#released: koneksi sudah tidak dipegang worker ini (diparkir atau sudah ditutup reject)
+			released = False
 			try:
-				data = self.connection.recv(1024)
-				if data:
-					#merubah input dari socket (berupa bytes) ke dalam string
-					#agar bisa mendeteksi \r\n
-					d = data.decode()
-					rcv=rcv+d
-					if '\r\n\r\n' in rcv:
-						#end of command, proses string
-						logging.warning("data dari client: {}" . format(rcv))
-						hasil = httpserver.proses(rcv)
-						#hasil akan berupa bytes
-						#untuk bisa ditambahi dengan string, maka string harus di encode
-						hasil=hasil+"\r\n\r\n".encode()
-						logging.warning("balas ke  client: {}" . format(hasil))
-						#hasil sudah dalam bentuk bytes
-						self.connection.sendall(hasil)
-						rcv=""
-						self.connection.close()
+				if time.monotonic() - queued_at > QUEUE_TIMEOUT:
+					#terlalu lama menunggu worker: client lebih baik mencoba lagi
+					self.server.reject(self.connection)
+					released = True
 				else:
+					released = self.serve(client)
+			except Exception as e:
+				logging.warning("error melayani {}: {}".format(self.address, e))
+			finally:
+				if not released:
+					self.connection.close()
+					metrics.inc("uno_connections_active", -1)
+				self.connection = None
+				metrics.inc("uno_workers_busy", -1)
+				self.antrian.task_done()
+
+	def serve(self, client):
+		#True jika koneksi diserahkan ke ConnectionParker, False jika harus ditutup
+		parker = self.server.parker
+		self.connection.settimeout(KEEPALIVE_TIMEOUT)
+		if client.long_poll is not None:
+			request, hasil = client.long_poll
+			client.long_poll = None
+			if not self.reply(request, hasil.render()):
+				return False
+		while True:
+			while client.requests:
+				request = client.requests.pop(0)
+				logging.debug("data dari client: %s %s %s", request.method, request.path, request.body)
+				hasil, keep_alive = httpserver.handle_request(request)
+				if isinstance(hasil, EventStream):
+					#event stream: dikirim dari listener game, koneksi tidak memegang worker
+					request_finished(request, 200, 0)
+					parker.open_stream(client, hasil)
+					return True
+				if isinstance(hasil, LongPoll):
+					if not hasil.ready():
+						#long-polling: ditunggu ConnectionParker sampai state berubah atau timeout
+						parker.wait_long_poll(client, request, hasil)
+						return True
+					hasil = hasil.render()
+				if not self.reply(request, hasil) or not keep_alive:
+					return False
+			if client.initial:
+				data, client.initial = client.initial, b""
+			elif client.readable:
+				#ConnectionParker sudah melihat data masuk, recv tidak menunggu
+				client.readable = False
+				try:
+					data = self.connection.recv(4096)
+				except OSError as e:
+					return False
+			else:
+				parker.park(client)
+				return True
+			if not data:
+				return False
+			metrics.inc("uno_bytes_received_total", len(data))
+			#satu koneksi bisa membawa beberapa request berturut-turut,
+			#parser mengembalikan request yang sudah lengkap (header + body)
+			try:
+				parse_started = time.perf_counter()
+				client.requests = client.parser.feed(data)
+				parse_ended = time.perf_counter()
+			except ParseError as e:
+				self.send(httpserver.error_response(e).to_bytes())
+				return False
+			for request in client.requests:
+				tracing.begin(request, parse_started, parse_ended)
+
+	def reply(self, request, hasil):
+		if isinstance(hasil, FileResponse):
+			#isi file dikirim langsung dari disk oleh kernel (sendfile)
+			write_started = time.perf_counter()
+			terkirim = self.send_file(hasil)
+			kode = hasil.response.kode
+		else:
+			logging.debug("balas ke  client: %s %s", hasil.kode, hasil.body)
+			write_started = time.perf_counter()
+			terkirim = self.send_response(hasil)
+			kode = hasil.kode
+		if terkirim is None:
+			return False
+		tracing.record(request, "write", write_started)
+		request_finished(request, kode, terkirim)
+		return True
+
+	def send_file(self, hasil):
+		try:
+			self.connection.sendall(hasil.response.head())
+			with open(hasil.entry.path, 'rb') as fp:
+				terkirim = self.connection.sendfile(fp, hasil.offset, hasil.length)
+			return len(hasil.response.head()) + terkirim
+		except OSError as e:
+			return None
+
+	def send_response(self, hasil):
+		#header dan body dikirim dengan satu sendmsg tanpa digabung lebih dulu
+		buffers = hasil.buffers()
+		total = sum(len(b) for b in buffers)
+		try:
+			terkirim = self.connection.sendmsg(buffers)
+			if terkirim < total:
+				self.connection.sendall(b"".join(buffers)[terkirim:])
+			return total
+		except OSError as e:
+			return None
+
+	def send(self, hasil):
+		try:
+			self.connection.sendall(hasil)
+			return True
+		except OSError as e:
+			return False
+
+class ConnectionParker(threading.Thread):
+	#koneksi yang tidak sedang diproses worker ditunggu di sini dengan satu selector:
+	#  keep-alive yang diam    -> masuk antrian worker lagi begitu ada data, ditutup setelah KEEPALIVE_TIMEOUT
+	#  long-poll (wait)        -> masuk antrian worker saat listener game terpanggil atau timeout
+	#  event stream (/events)  -> frame ditulis listener game langsung ke socket non-blocking, ping dari sini
+	#selector hanya diubah thread ini; thread lain mengirim perintah lewat antrian + socket pembangun
+	def __init__(self, server):
+		self.server = server
+		self.selector = selectors.DefaultSelector()
+		self.incoming = queue.SimpleQueue()
+		self.wake_r, self.wake_w = socket.socketpair()
+		self.wake_r.setblocking(False)
+		self.wake_w.setblocking(False)
+		#heap (deadline, urutan, client, LongPoll) untuk timeout long-poll
+		self.polls = []
+		self.order = itertools.count()
+		self.idle = set()
+		self.streams = set()
+		threading.Thread.__init__(self, name="parker", daemon=True)
+
+	def submit(self, kind, client, poll=None):
+		#poll: (deadline, LongPoll) untuk kind "poll"
+		self.incoming.put((kind, client, poll))
+		try:
+			self.wake_w.send(b"\0")
+		except OSError:
+			#buffer penuh: thread parker memang sedang akan bangun
+			pass
+
+	def park(self, client):
+		self.submit("idle", client)
+
+	def wait_long_poll(self, client, request, hasil):
+		client.long_poll = (request, hasil)
+		client.waiting = True
+		hasil.listener = lambda version, events: self.wake_long_poll(client, hasil)
+		hasil.game.add_listener(hasil.listener)
+		self.submit("poll", client, (time.monotonic() + hasil.timeout, hasil))
+		if hasil.ready():
+			#state berubah sebelum listener terpasang
+			self.wake_long_poll(client, hasil)
+
+	def wake_long_poll(self, client, hasil):
+		#dipanggil listener game (di dalam lock game) atau thread ini saat timeout; hanya yang pertama berlaku.
+		#hasil harus long-poll yang sedang ditunggu: deadline wait lama yang sudah selesai diabaikan
+		with client.lock:
+			if not client.waiting or client.long_poll[1] is not hasil:
+				return
+			client.waiting = False
+		hasil.game.remove_listener(hasil.listener)
+		self.server.enqueue(client)
+
+	def open_stream(self, client, hasil):
+		client.stream = hasil
+		#event awal dan pemasangan listener di dalam lock game agar tidak ada event yang terlewat
+		with hasil.game.lock:
+			client.outgoing = bytearray(hasil.head())
+			hasil.attach(lambda version, events: self.write(client, hasil.frames(events)))
+		client.connection.setblocking(False)
+		self.write(client, b"")
+		self.submit("stream", client)
+
+	def write(self, client, data):
+		#socket event stream non-blocking: yang belum terkirim ditahan dan dicoba lagi di write berikutnya
+		with client.lock:
+			if client.closed:
+				return
+			client.outgoing += data
+			try:
+				terkirim = client.connection.send(client.outgoing)
+				del client.outgoing[:terkirim]
+				putus = len(client.outgoing) > MAX_STREAM_BUFFER
+			except BlockingIOError:
+				putus = len(client.outgoing) > MAX_STREAM_BUFFER
+			except OSError:
+				putus = True
+		if putus and self.end_stream(client):
+			self.submit("close", client)
+
+	def end_stream(self, client):
+		#True hanya untuk pemanggil pertama, yang kemudian bertugas menutup koneksi
+		with client.lock:
+			if client.closed:
+				return False
+			client.closed = True
+		client.stream.detach()
+		return True
+
+	def run(self):
+		self.selector.register(self.wake_r, selectors.EVENT_READ)
+		next_sweep = time.monotonic() + SWEEP_INTERVAL
+		next_ping = time.monotonic() + EVENT_PING_INTERVAL
+		while True:
+			now = time.monotonic()
+			timeout = next_sweep - now
+			if self.polls:
+				timeout = min(timeout, self.polls[0][0] - now)
+			for key, mask in self.selector.select(max(0, timeout)):
+				if key.fileobj is self.wake_r:
+					try:
+						while self.wake_r.recv(4096):
+							pass
+					except BlockingIOError:
+						pass
+				else:
+					self.readable(key.data)
+			while True:
+				try:
+					kind, client, poll = self.incoming.get_nowait()
+				except queue.Empty:
 					break
-			except OSError as e:
-				pass
-		self.connection.close()
+				self.accept_command(kind, client, poll)
+			now = time.monotonic()
+			while self.polls and self.polls[0][0] <= now:
+				deadline, order, client, hasil = heapq.heappop(self.polls)
+				self.wake_long_poll(client, hasil)
+			if now >= next_sweep:
+				next_sweep = now + SWEEP_INTERVAL
+				self.sweep(now)
+			if now >= next_ping:
+				next_ping = now + EVENT_PING_INTERVAL
+				for client in list(self.streams):
+					self.write(client, b": ping\n\n")
+
+	def accept_command(self, kind, client, poll):
+		if kind == "poll":
+			deadline, hasil = poll
+			heapq.heappush(self.polls, (deadline, next(self.order), client, hasil))
+			return
+		if kind == "close":
+			self.close(client)
+			return
+		try:
+			self.selector.register(client.connection, selectors.EVENT_READ, client)
+		except (OSError, ValueError):
+			#socket sudah ditutup (event stream yang putus sebelum sempat didaftarkan)
+			if kind == "idle" or self.end_stream(client):
+				self.close(client)
+			return
+		if kind == "idle":
+			client.deadline = time.monotonic() + KEEPALIVE_TIMEOUT
+			self.idle.add(client)
+		else:
+			self.streams.add(client)
+
+	def readable(self, client):
+		if client in self.idle:
+			#request berikutnya datang: kembali ke worker
+			self.idle.discard(client)
+			self.selector.unregister(client.connection)
+			client.readable = True
+			self.server.enqueue(client)
+			return
+		#event stream: data dari client diabaikan, EOF berarti client menutup koneksi
+		try:
+			data = client.connection.recv(4096)
+		except BlockingIOError:
+			return
+		except OSError:
+			data = b""
+		if not data and self.end_stream(client):
+			self.close(client)
+
+	def sweep(self, now):
+		for client in [client for client in self.idle if client.deadline <= now]:
+			self.close(client)
+
+	def close(self, client):
+		if client in self.idle or client in self.streams:
+			self.idle.discard(client)
+			self.streams.discard(client)
+			self.selector.unregister(client.connection)
+		client.connection.close()
+		metrics.inc("uno_connections_active", -1)
 
 class Server(threading.Thread):
-	def __init__(self):
-		self.the_clients = []
+	def __init__(self, port=8889, backlog=128, workers=64, max_queue=256):
+		self.port = port
+		self.backlog = backlog
+		#koneksi yang siap diproses tetapi menunggu worker; selebihnya dibalas 503
+		self.antrian = queue.Queue(maxsize=max_queue)
+		self.workers = [ProcessTheClient(self) for _ in range(workers)]
+		self.parker = ConnectionParker(self)
 		self.my_socket = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
 		self.my_socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
 		threading.Thread.__init__(self)
 
+	def start_workers(self):
+		self.parker.start()
+		for worker in self.workers:
+			worker.start()
+
 	def run(self):
-		self.my_socket.bind(('0.0.0.0', 8889))
-		self.my_socket.listen(1)
+		self.start_workers()
+		self.my_socket.bind(('0.0.0.0', self.port))
+		self.my_socket.listen(self.backlog)
 		while True:
 			self.connection, self.client_address = self.my_socket.accept()
-			logging.warning("connection from {}".format(self.client_address))
+			logging.debug("connection from %s", self.client_address)
+			metrics.inc("uno_connections_total")
+			metrics.inc("uno_connections_active")
+			#worker baru diambil setelah request pertama mulai masuk
+			self.parker.park(Client(self.connection, self.client_address))
+
+	def enqueue(self, client):
+		try:
+			self.antrian.put_nowait((client, time.monotonic()))
+		except queue.Full:
+			self.reject(client.connection)
+
+	def reject(self, connection):
+		#server penuh: balas 503 secepatnya tanpa membaca request. bisa dipanggil thread parker atau
+		#listener game (di dalam lock room), jadi hanya satu send non-blocking; yang tidak muat dibuang
+		try:
+			connection.setblocking(False)
+			connection.send(httpserver.response(503, 'Service Unavailable', 'Server busy', {'Retry-After': '1'}).to_bytes())
+		except OSError:
+			pass
+		connection.close()
+		metrics.inc("uno_connections_rejected_total")
+		metrics.inc("uno_connections_active", -1)
 
-			clt = ProcessTheClient(self.connection, self.client_address)
-			clt.start()
-			self.the_clients.append(clt)
+def housekeeping_options(args):
+	return {"turn_timeout": args.turn_timeout, "idle_timeout": args.idle_timeout,
+			"game_ttl": args.game_ttl, "finished_ttl": args.finished_ttl}
 
 def main():
-	svr = Server()
+	parser = argparse.ArgumentParser(description="UNO HTTP server")
+	parser.add_argument('--engine', choices=['thread', 'async'], default='thread',
+						help="thread: pool thread worker, async: satu event loop asyncio")
+	parser.add_argument('--port', type=int, default=8889)
+	parser.add_argument('--backlog', type=int, default=128)
+	parser.add_argument('--log-level', default='WARNING', choices=['DEBUG', 'INFO', 'WARNING', 'ERROR'],
+						help="DEBUG juga mencetak isi request dan balasan")
+	parser.add_argument('--access-log-sample', type=float, default=1.0,
+						help="porsi request yang dicatat di access log (0 = mati, 0.1 = 10%%)")
+	parser.add_argument('--workers', type=int, default=64,
+						help="jumlah thread worker engine thread; worker hanya dipakai selama request diproses, koneksi diam, wait dan events menunggu di satu thread selector")
+	parser.add_argument('--max-queue', type=int, default=256,
+						help="request yang boleh menunggu worker, selebihnya (atau yang menunggu lebih dari {} detik) dibalas 503".format(QUEUE_TIMEOUT))
+	parser.add_argument('--admin-token',
+						help="aktifkan POST /admin (tracing, profiler) dengan header X-Admin-Token ini")
+	parser.add_argument('--profile-dir', metavar='DIR',
+						help="direktori hasil profiler /admin (default: <tmp>/uno-profiles, di luar root file statis)")
+	parser.add_argument('--journal', metavar='DIR',
+						help="simpan setiap aksi game ke journal di DIR, room dipulihkan saat server start ulang")
+	parser.add_argument('--journal-fsync', choices=FSYNC_MODES, default='batch',
+						help="always: fsync tiap aksi, batch: fsync berkelompok tiap 50 ms, off: tanpa fsync")
+	parser.add_argument('--turn-timeout', type=float, default=60,
+						help="detik sebelum pemain yang tidak bergerak otomatis menarik kartu (0 = mati)")
+	parser.add_argument('--idle-timeout', type=float, default=120,
+						help="detik tanpa request sebelum pemain dikeluarkan, harus > timeout wait (0 = mati)")
+	parser.add_argument('--game-ttl', type=float, default=1800,
+						help="detik tanpa aktivitas sebelum room ditutup (0 = mati)")
+	parser.add_argument('--finished-ttl', type=float, default=300,
+						help="detik setelah ada pemenang sebelum room ditutup (0 = mati)")
+	parser.add_argument('--processes', type=int, default=1,
+						help="jalankan N proses worker (engine thread) di belakang satu dispatcher, room dibagi per proses")
+	args = parser.parse_args()
+	accesslog.setup(getattr(logging, args.log_level), args.access_log_sample)
+
+	if args.processes > 1:
+		import server_prefork
+		server_prefork.main(args)
+		return
+
+	global httpserver
+	journal = Journal(args.journal, fsync=args.journal_fsync) if args.journal else None
+	httpserver = HttpServer(journal=journal, admin_token=args.admin_token, housekeeping=housekeeping_options(args),
+							profile_dir=args.profile_dir)
+
+	if args.engine == 'async':
+		import server_async_http
+		server_async_http.main(httpserver, port=args.port, backlog=args.backlog, setup_logging=False)
+		return
+
+	svr = Server(port=args.port, backlog=args.backlog, workers=args.workers, max_queue=args.max_queue)
 	svr.start()
 
 if __name__=="__main__":
@@ -0,0 +1,358 @@
+# simulate.py
+# Simulator self-play untuk menguji aturan dan strategi bot dalam jumlah game yang besar.
+# SimGame menjalankan aturan yang sama dengan logic.Game (play_card, _apply_card_effects,
+# draw_card, pinalti UNO / callout) tanpa lock, snapshot, event dan nama kartu, dan memakai
+# urutan pemakaian RNG yang sama sehingga seed yang sama menghasilkan game yang sama persis.
+#   python3 simulate.py --games 100000 --players 4 --strategies random,color,aggressive,first
+#   python3 simulate.py --check 200      bandingkan dengan logic.Game pada 200 seed acak
+import argparse
+import importlib
+import multiprocessing
+import os
+import random
+import time
+from logic import (Game, FULL_DECK, CARD_BASE, CARD_COLOR, CARD_VALUE, CARD_COUNT, MATCHES, COLOR_NAMES,
+                   BLACK, SKIP, REVERSE, DRAW_TWO, WILD_DRAW_FOUR)
+
+MAX_TURNS = 1000
+
+class SimGame:
+    __slots__ = ('rng', 'deck', 'discard_pile', 'hands', 'declared', 'turn', 'direction', 'winner', 'reshuffles')
+
+    def __init__(self, seed, player_count):
+        self.rng = random.Random(seed)
+        self.deck = bytearray(FULL_DECK)
+        self.rng.shuffle(self.deck)
+        self.discard_pile = bytearray()
+        self.turn = 0
+        self.direction = 1
+        self.winner = None
+        self.reshuffles = 0
+        first_card = self.deck.pop()
+        while CARD_VALUE[first_card] >= SKIP:
+            self.deck.append(first_card)
+            self.rng.shuffle(self.deck)
+            first_card = self.deck.pop()
+        self.discard_pile.append(first_card)
+        self.hands = [self.draw_cards(7) for _ in range(player_count)]
+        self.declared = [False] * player_count
+
+    def draw_cards(self, count):
+        cards = bytearray()
+        for _ in range(count):
+            if not self.deck:
+                if len(self.discard_pile) <= 1:
+                    break
+                self.deck = self.discard_pile[:-1].translate(CARD_BASE)
+                self.rng.shuffle(self.deck)
+                self.discard_pile = self.discard_pile[-1:]
+                self.reshuffles += 1
+            cards.append(self.deck.pop())
+        return cards
+
+    def current(self):
+        return self.turn
+
+    def hand(self, seat):
+        return self.hands[seat]
+
+    def top(self):
+        return self.discard_pile[-1]
+
+    def vulnerable(self, seat):
+        return len(self.hands[seat]) == 1 and not self.declared[seat]
+
+    def _advance_turn(self):
+        self.declared[self.turn] = False
+        self.turn = (self.turn + self.direction) % len(self.hands)
+
+    def play(self, seat, index, color=None):
+        hand = self.hands[seat]
+        played = hand[index]
+        played_val = CARD_VALUE[played]
+        del hand[index]
+        self.discard_pile.append(color * 16 + played_val if CARD_COLOR[played] == BLACK else played)
+        if not hand:
+            self.winner = seat
+            return
+        skip_turn = False
+        if played_val == SKIP:
+            skip_turn = True
+        elif played_val == REVERSE:
+            if len(self.hands) == 2: skip_turn = True
+            else: self.direction *= -1
+        elif played_val == DRAW_TWO or played_val == WILD_DRAW_FOUR:
+            next_seat = (self.turn + self.direction) % len(self.hands)
+            self.hands[next_seat] += self.draw_cards(2 if played_val == DRAW_TWO else 4)
+            skip_turn = True
+        self._advance_turn()
+        if skip_turn:
+            self._advance_turn()
+
+    def draw(self, seat):
+        self.hands[seat] += self.draw_cards(1)
+        self._advance_turn()
+
+    def uno(self, seat):
+        if len(self.hands[seat]) == 1:
+            self.declared[seat] = True
+        else:
+            self.hands[seat] += self.draw_cards(1)
+
+    def callout(self, caller, target):
+        if self.vulnerable(target):
+            self.hands[target] += self.draw_cards(2)
+        else:
+            self.hands[caller] += self.draw_cards(1)
+
+    def state(self):
+        return (tuple(bytes(hand) for hand in self.hands), bytes(self.deck), bytes(self.discard_pile),
+                self.turn, self.direction, self.winner, tuple(self.declared), self.rng.getstate())
+
+class LogicGame:
+    # antarmuka SimGame di atas logic.Game asli, dipakai mode --check
+    def __init__(self, seed, player_count):
+        self.game = Game(seed)
+        self.ids = [f"p{seat}" for seat in range(player_count)]
+        for pid in self.ids:
+            self.game.add_player(pid)
+
+    @property
+    def winner(self):
+        return self.ids.index(self.game.winner) if self.game.winner else None
+
+    def current(self):
+        return self.game.current_turn_index
+
+    def hand(self, seat):
+        return self.game.players[self.ids[seat]]["hand"]
+
+    def top(self):
+        return self.game.discard_pile[-1]
+
+    def vulnerable(self, seat):
+        data = self.game.players[self.ids[seat]]
+        return len(data["hand"]) == 1 and not data["uno_declared"]
+
+    def _check(self, result):
+        if result["status"] != "OK":
+            raise RuntimeError(result["message"])
+
+    def play(self, seat, index, color=None):
+        self._check(self.game.play_card(self.ids[seat], index, COLOR_NAMES[color] if color is not None else None))
+
+    def draw(self, seat):
+        self.game.draw_card(self.ids[seat])
+
+    def uno(self, seat):
+        self.game.declare_uno(self.ids[seat])
+
+    def callout(self, caller, target):
+        self.game.call_out_player(self.ids[caller], self.ids[target])
+
+    def state(self):
+        game = self.game
+        return (tuple(bytes(game.players[pid]["hand"]) for pid in self.ids), bytes(game.deck), bytes(game.discard_pile),
+                game.current_turn_index, game.direction, self.winner,
+                tuple(game.players[pid]["uno_declared"] for pid in self.ids), game.rng.getstate())
+
+# --- strategi bot ---
+# choose() menerima tangan (bytearray id kartu), kartu teratas dan index kartu yang boleh dimainkan,
+# lalu mengembalikan (index, warna) atau (None, None) untuk menarik kartu.
+
+def most_common_color(hand):
+    counts = [0, 0, 0, 0]
+    for card in hand:
+        if CARD_COLOR[card] != BLACK:
+            counts[CARD_COLOR[card]] += 1
+    return counts.index(max(counts))
+
+class RandomStrategy:
+    uno_rate = 0.9
+    callout_rate = 0.5
+    # peluang salah menyatakan UNO atau salah menantang (kena pinalti +1)
+    mistake_rate = 0.02
+
+    def choose(self, hand, top, playable, rng):
+        index = rng.choice(playable)
+        return index, rng.randrange(4) if CARD_COLOR[hand[index]] == BLACK else None
+
+    def declare_uno(self, rng):
+        return rng.random() < self.uno_rate
+
+    def callout(self, rng):
+        return rng.random() < self.callout_rate
+
+    def mistake(self, rng):
+        return self.mistake_rate > 0 and rng.random() < self.mistake_rate
+
+class FirstStrategy(RandomStrategy):
+    def choose(self, hand, top, playable, rng):
+        index = playable[0]
+        return index, most_common_color(hand) if CARD_COLOR[hand[index]] == BLACK else None
+
+class ColorStrategy(RandomStrategy):
+    # buang kartu berwarna terbanyak di tangan, simpan wild untuk terakhir
+    uno_rate = 1.0
+    callout_rate = 1.0
+    mistake_rate = 0
+
+    def choose(self, hand, top, playable, rng):
+        color = most_common_color(hand)
+        colored = [i for i in playable if CARD_COLOR[hand[i]] != BLACK]
+        if not colored:
+            return playable[0], color
+        same = [i for i in colored if CARD_COLOR[hand[i]] == color]
+        return (same or colored)[0], None
+
+class AggressiveStrategy(RandomStrategy):
+    # dahulukan kartu aksi (Draw Four, Draw Two, Skip, Reverse) untuk menghambat lawan
+    uno_rate = 1.0
+    callout_rate = 1.0
+    mistake_rate = 0
+
+    def choose(self, hand, top, playable, rng):
+        index = max(playable, key=lambda i: CARD_VALUE[hand[i]])
+        return index, most_common_color(hand) if CARD_COLOR[hand[index]] == BLACK else None
+
+STRATEGIES = {
+    "random": RandomStrategy,
+    "first": FirstStrategy,
+    "color": ColorStrategy,
+    "aggressive": AggressiveStrategy
+}
+
+def load_strategy(name):
+    # nama bawaan atau "modul:Kelas" untuk strategi sendiri
+    if name in STRATEGIES:
+        return STRATEGIES[name]()
+    module_name, sep, class_name = name.partition(":")
+    if not sep:
+        raise ValueError("strategi tidak dikenal: {}".format(name))
+    return getattr(importlib.import_module(module_name), class_name)()
+
+def decision_rng(seed):
+    # keputusan bot memakai RNG terpisah dari RNG kocokan kartu
+    return random.Random(seed ^ 0x5DEECE66D)
+
+def run_game(game, strategies, rng, max_turns=MAX_TURNS):
+    turns = 0
+    player_count = len(strategies)
+    while game.winner is None and turns < max_turns:
+        seat = game.current()
+        hand = game.hand(seat)
+        row = game.top() * CARD_COUNT
+        playable = [i for i, card in enumerate(hand) if MATCHES[row + card]]
+        strategy = strategies[seat]
+        index, color = strategy.choose(hand, game.top(), playable, rng) if playable else (None, None)
+        if index is None:
+            game.draw(seat)
+        else:
+            game.play(seat, index, color)
+            if len(hand) == 1 and strategy.declare_uno(rng):
+                game.uno(seat)
+            elif len(hand) > 1 and strategy.mistake(rng):
+                game.uno(seat)
+        if game.winner is None:
+            # pemain yang mendapat giliran boleh menantang pemain lain yang lupa UNO
+            challenger = game.current()
+            for target in range(player_count):
+                if target != challenger and game.vulnerable(target) and strategies[challenger].callout(rng):
+                    game.callout(challenger, target)
+                    break
+            else:
+                if strategies[challenger].mistake(rng):
+                    game.callout(challenger, (challenger + 1) % player_count)
+        turns += 1
+    return turns
+
+def simulate_chunk(task):
+    first_seed, count, names, max_turns = task
+    strategies = [load_strategy(name) for name in names]
+    wins = [0] * len(names)
+    total_turns = max_turns_seen = capped = reshuffles = 0
+    for seed in range(first_seed, first_seed + count):
+        game = SimGame(seed, len(names))
+        turns = run_game(game, strategies, decision_rng(seed), max_turns)
+        if game.winner is None:
+            capped += 1
+        else:
+            wins[game.winner] += 1
+        total_turns += turns
+        max_turns_seen = max(max_turns_seen, turns)
+        reshuffles += game.reshuffles
+    return {"games": count, "wins": wins, "turns": total_turns, "max_turns": max_turns_seen,
+            "capped": capped, "reshuffles": reshuffles}
+
+def merge(results):
+    total = {"games": 0, "wins": None, "turns": 0, "max_turns": 0, "capped": 0, "reshuffles": 0}
+    for result in results:
+        if total["wins"] is None:
+            total["wins"] = [0] * len(result["wins"])
+        total["wins"] = [a + b for a, b in zip(total["wins"], result["wins"])]
+        for key in ("games", "turns", "capped", "reshuffles"):
+            total[key] += result[key]
+        total["max_turns"] = max(total["max_turns"], result["max_turns"])
+    return total
+
+def cross_check(samples, names, seed, max_turns):
+    # seed acak dimainkan di SimGame dan logic.Game dengan keputusan yang sama, state akhir harus identik
+    sampler = random.Random(seed)
+    mismatches = []
+    for _ in range(samples):
+        game_seed = sampler.getrandbits(63)
+        results = []
+        for engine in (SimGame, LogicGame):
+            game = engine(game_seed, len(names))
+            turns = run_game(game, [load_strategy(name) for name in names], decision_rng(game_seed), max_turns)
+            results.append((turns, game.state()))
+        if results[0] != results[1]:
+            mismatches.append(game_seed)
+    return mismatches
+
+def main():
+    parser = argparse.ArgumentParser(description="simulator self-play UNO")
+    parser.add_argument('--games', type=int, default=10000)
+    parser.add_argument('--players', type=int, default=4)
+    parser.add_argument('--strategies', default='random',
+                        help="daftar strategi per kursi dipisah koma (diulang jika kurang): " + ", ".join(STRATEGIES) + " atau modul:Kelas")
+    parser.add_argument('--seed', type=int, default=0, help="seed game pertama, game ke-i memakai seed+i")
+    parser.add_argument('--max-turns', type=int, default=MAX_TURNS)
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--chunk', type=int, default=1000, help="jumlah game per tugas worker")
+    parser.add_argument('--check', type=int, metavar='N', help="bandingkan N seed acak dengan logic.Game lalu keluar")
+    args = parser.parse_args()
+
+    names = args.strategies.split(",")
+    names = [names[seat % len(names)] for seat in range(args.players)]
+    for name in set(names):
+        load_strategy(name)
+
+    if args.check:
+        mismatches = cross_check(args.check, names, args.seed, args.max_turns)
+        if mismatches:
+            print("TIDAK COCOK pada {} dari {} seed, contoh: {}".format(len(mismatches), args.check, mismatches[:5]))
+            raise SystemExit(1)
+        print("cocok: {} seed identik dengan logic.Game".format(args.check))
+        return
+
+    tasks = [(first, min(args.chunk, args.seed + args.games - first), names, args.max_turns)
+             for first in range(args.seed, args.seed + args.games, args.chunk)]
+    started = time.perf_counter()
+    if args.workers > 1:
+        with multiprocessing.Pool(args.workers) as pool:
+            total = merge(pool.imap_unordered(simulate_chunk, tasks))
+    else:
+        total = merge(map(simulate_chunk, tasks))
+    elapsed = time.perf_counter() - started
+
+    games = total["games"]
+    print("{} game, {} pemain, {} worker, {:.2f} s = {:.0f} game/s".format(
+        games, args.players, args.workers, elapsed, games / elapsed))
+    print("rata-rata {:.1f} giliran, maksimum {}, {} game tanpa pemenang, {:.2f} kocok ulang per game".format(
+        total["turns"] / games, total["max_turns"], total["capped"], total["reshuffles"] / games))
+    for seat, name in enumerate(names):
+        print("kursi {} {:<12} menang {:>6.2f}%".format(seat, name, 100.0 * total["wins"][seat] / games))
+
+if __name__ == "__main__":
+    main()
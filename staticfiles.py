@@ -0,0 +1,109 @@
+import os
+from email.utils import formatdate, parsedate_to_datetime
+
+# file sampai ukuran ini disimpan di memori, yang lebih besar dikirim lewat sendfile
+MEMORY_CACHE_SIZE = 64 * 1024
+
+class FileEntry:
+    def __init__(self, path, stat, content_type):
+        self.path = path
+        self.size = stat.st_size
+        self.mtime_ns = stat.st_mtime_ns
+        self.mtime = int(stat.st_mtime)
+        self.content_type = content_type
+        self.etag = '"{:x}-{:x}"'.format(self.size, self.mtime_ns)
+        self.last_modified = formatdate(stat.st_mtime, usegmt=True)
+        self.content = None
+        if self.size <= MEMORY_CACHE_SIZE:
+            with open(path, 'rb') as fp:
+                self.content = fp.read()
+
+    def is_stale(self, stat):
+        return stat.st_size != self.size or stat.st_mtime_ns != self.mtime_ns
+
+class FileResponse:
+    # header berupa Response tanpa body, isi file dikirim engine langsung dari disk (os.sendfile)
+    def __init__(self, response, entry, offset, length):
+        self.response = response
+        self.entry = entry
+        self.offset = offset
+        self.length = length
+        self.keep_alive = False
+
+    def read(self):
+        if self.entry.content is not None:
+            return self.entry.content[self.offset:self.offset + self.length]
+        with open(self.entry.path, 'rb') as fp:
+            fp.seek(self.offset)
+            return fp.read(self.length)
+
+class StaticFiles:
+    def __init__(self, root, types):
+        self.root = root
+        self.types = types
+        self.index = {}
+        self.dir_mtime_ns = None
+
+    def _refresh(self):
+        # daftar file hanya dibaca ulang jika isi direktori berubah
+        dir_mtime_ns = os.stat(self.root).st_mtime_ns
+        if dir_mtime_ns == self.dir_mtime_ns:
+            return
+        names = set()
+        with os.scandir(self.root) as it:
+            for item in it:
+                if not item.name.startswith('.') and item.is_file():
+                    names.add(item.name)
+        self.index = {name: entry for name, entry in self.index.items() if name in names}
+        for name in names:
+            self.index.setdefault(name, None)
+        self.dir_mtime_ns = dir_mtime_ns
+
+    def lookup(self, name):
+        self._refresh()
+        if name not in self.index:
+            return None
+        path = os.path.join(self.root, name)
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        entry = self.index.get(name)
+        if entry is None or entry.is_stale(stat):
+            fext = os.path.splitext(name)[1]
+            entry = FileEntry(path, stat, self.types.get(fext, 'application/octet-stream'))
+            self.index[name] = entry
+        return entry
+
+    def not_modified(self, entry, headers):
+        if_none_match = headers.get('if-none-match')
+        if if_none_match is not None:
+            tags = [tag.strip() for tag in if_none_match.split(',')]
+            return '*' in tags or entry.etag in tags
+        if_modified_since = headers.get('if-modified-since')
+        if if_modified_since:
+            try:
+                return entry.mtime <= parsedate_to_datetime(if_modified_since).timestamp()
+            except (TypeError, ValueError):
+                return False
+        return False
+
+    def byte_range(self, entry, range_header):
+        # hanya satu range "bytes=a-b" yang didukung; None = kirim seluruh file,
+        # False = range tidak bisa dipenuhi (416)
+        if not range_header or not range_header.startswith('bytes=') or ',' in range_header:
+            return None
+        start, sep, end = range_header[len('bytes='):].strip().partition('-')
+        if not sep or not (start.isdigit() or end.isdigit()):
+            return None
+        if not start:
+            length = min(int(end), entry.size)
+            if length == 0:
+                return False
+            return entry.size - length, length
+        start = int(start)
+        end = int(end) if end.isdigit() else entry.size - 1
+        if start >= entry.size or end < start:
+            return False
+        end = min(end, entry.size - 1)
+        return start, end - start + 1
@@ -0,0 +1,147 @@
+# tracing.py
+# Tracing per request (opsional, bisa dinyalakan saat server berjalan) dan sampling profiler.
+# Saat tracing mati, setiap titik ukur hanya memeriksa satu atribut lalu kembali.
+import collections
+import logging
+import os
+import random
+import sys
+import threading
+import time
+
+trace_logger = logging.getLogger("trace")
+enabled = False
+sample_rate = 1.0
+recent = collections.deque(maxlen=200)
+_current = threading.local()
+
+class Trace:
+    __slots__ = ('method', 'path', 'command', 'started', 'spans')
+
+    def __init__(self, request, started):
+        self.method = request.method
+        self.path = request.path
+        self.command = None
+        self.started = started
+        # (nama tahap, mulai, selesai) dalam detik perf_counter
+        self.spans = []
+
+    def to_dict(self, total):
+        spans = {}
+        for name, started, ended in self.spans:
+            spans[name] = spans.get(name, 0) + (ended - started) * 1000
+        spans["other"] = total * 1000 - sum(spans.values())
+        return {"method": self.method, "path": self.path, "command": self.command,
+                "total_ms": round(total * 1000, 3), "spans_ms": {name: round(ms, 3) for name, ms in spans.items()}}
+
+class _Span:
+    __slots__ = ('trace', 'name', 'started')
+
+    def __init__(self, trace, name):
+        self.trace = trace
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.trace.spans.append((self.name, self.started, time.perf_counter()))
+        return False
+
+class _NoSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+_NO_SPAN = _NoSpan()
+
+def configure(on, rate=None):
+    global enabled, sample_rate
+    if rate is not None:
+        sample_rate = max(0.0, min(1.0, rate))
+    enabled = on
+    if on and trace_logger.getEffectiveLevel() > logging.INFO:
+        trace_logger.setLevel(logging.INFO)
+
+def begin(request, parse_started, parse_ended):
+    # dipanggil engine setelah parser mengembalikan request; request yang tidak di-sampling trace-nya None
+    if not enabled or (sample_rate < 1.0 and random.random() >= sample_rate):
+        return
+    request.trace = Trace(request, parse_started)
+    request.trace.spans.append(("parse", parse_started, parse_ended))
+
+def activate(trace):
+    # trace milik request yang sedang diproses thread ini, dipakai span() di HttpServer
+    _current.trace = trace
+
+def span(name):
+    trace = getattr(_current, 'trace', None)
+    if trace is None:
+        return _NO_SPAN
+    return _Span(trace, name)
+
+def record(request, name, started):
+    if request.trace is not None:
+        request.trace.spans.append((name, started, time.perf_counter()))
+
+def finish(request, kode, total):
+    trace = request.trace
+    if trace is None:
+        return
+    trace.command = request.command
+    result = trace.to_dict(total)
+    result["status"] = kode
+    recent.append(result)
+    trace_logger.info("{} {} cmd={} status={} total={:.3f}ms {}".format(
+        trace.method, trace.path, trace.command, kode, result["total_ms"],
+        " ".join("{}={:.3f}".format(name, ms) for name, ms in result["spans_ms"].items())))
+
+class SamplingProfiler(threading.Thread):
+    # mengambil stack semua thread tiap interval selama N detik lalu menulis format "collapsed"
+    # (satu baris per stack: frame;frame;frame jumlah) yang bisa dibuka flamegraph.pl / speedscope
+    running = None
+
+    def __init__(self, seconds, path, interval=0.005):
+        threading.Thread.__init__(self, name="sampling-profiler", daemon=True)
+        self.seconds = seconds
+        self.path = path
+        self.interval = interval
+        self.stacks = collections.Counter()
+        self.samples = 0
+
+    @classmethod
+    def start_profile(cls, seconds, path):
+        if cls.running is not None and cls.running.is_alive():
+            return None
+        profiler = cls(seconds, path)
+        cls.running = profiler
+        profiler.start()
+        return profiler
+
+    def run(self):
+        own = threading.get_ident()
+        deadline = time.monotonic() + self.seconds
+        while time.monotonic() < deadline:
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == own:
+                    continue
+                stack = []
+                while frame is not None:
+                    code = frame.f_code
+                    stack.append("{} ({}:{})".format(code.co_name, os.path.basename(code.co_filename), code.co_firstlineno))
+                    frame = frame.f_back
+                stack.append(names.get(ident, str(ident)))
+                self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+            time.sleep(self.interval)
+        # "x": file yang sudah ada tidak pernah ditimpa
+        with open(self.path, "x") as fp:
+            for stack, count in self.stacks.most_common():
+                fp.write("{} {}\n".format(stack, count))
+        logging.warning("profil {} sampel selama {} detik ditulis ke {}".format(self.samples, self.seconds, self.path))
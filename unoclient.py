@@ -0,0 +1,118 @@
+# unoclient.py
+# transport HTTP client UNO tanpa pygame, dipakai client.py dan loadgen.py
+import json
+import socket
+import wire
+
+def apply_delta(state, delta):
+    # gabungkan balasan delta (lihat Game.get_state_delta) ke state penuh sebelumnya
+    state = dict(state)
+    hand = list(state.get("hand", []))
+    for i in reversed(delta.get("hand_removed", [])): del hand[i]
+    hand += delta.get("hand_added", [])
+    statuses = dict(state.get("player_statuses", {}))
+    statuses.update(delta.get("player_statuses", {}))
+    for pid in delta.get("players_removed", []): statuses.pop(pid, None)
+    for key, value in delta.items():
+        if key not in ("delta", "base_version", "hand_removed", "hand_added", "player_statuses", "players_removed"):
+            state[key] = value
+    state["hand"], state["player_statuses"] = hand, statuses
+    return state
+
+class UnoClient:
+    def __init__(self, player_id, room_id=None, pool_size=2, timeout=5.0, host='localhost', port=8889, binary=False):
+        self.player_id = player_id
+        self.timeout = timeout
+        self.room_id = room_id
+        self.server_address = (host, port)
+        self.path = f"/uno/{room_id}" if room_id else "/uno"
+        # koneksi keep-alive yang menganggur dan bisa dipakai ulang
+        self.pool = []
+        self.pool_size = pool_size
+        # binary=True: request pertama meminta balasan biner (Accept), setelah server membalas
+        # dengan application/x-uno perintah /uno juga dikirim biner. server lama tetap dapat teks
+        self.binary = binary
+        self.binary_ok = False
+
+    def _connect(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.server_address)
+        return sock
+
+    def _release(self, sock):
+        if len(self.pool) < self.pool_size:
+            self.pool.append(sock)
+        else:
+            sock.close()
+
+    def close(self):
+        while self.pool:
+            self.pool.pop().close()
+
+    def _read_response(self, sock):
+        data_received = bytearray()
+        while b"\r\n\r\n" not in data_received:
+            chunk = sock.recv(4096)
+            if not chunk: raise ConnectionError("Connection closed by server")
+            data_received.extend(chunk)
+        header_end = data_received.find(b"\r\n\r\n")
+        header_lines = data_received[:header_end].decode('utf-8', errors='ignore').split("\r\n")
+        headers = {}
+        for line in header_lines[1:]:
+            name, _, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        content_length = int(headers.get("content-length", 0))
+        body = data_received[header_end + 4:]
+        while len(body) < content_length:
+            chunk = sock.recv(4096)
+            if not chunk: raise ConnectionError("Connection closed by server")
+            body.extend(chunk)
+        keep_alive = headers.get("connection", "").lower() != "close"
+        kode = int(header_lines[0].split(" ", 2)[1])
+        return kode, bytes(body[:content_length]), keep_alive, headers.get("content-type", "")
+
+    def send_command(self, command_body, path=None):
+        extra = ""
+        if self.binary_ok and path is None:
+            # perintah biner sekaligus berarti balasan biner, Accept tidak perlu dikirim lagi
+            payload = wire.encode_command(command_body)
+            extra = f"Content-Type: {wire.CONTENT_TYPE}\r\n"
+        else:
+            payload = command_body.encode('utf-8')
+            if self.binary and path is None:
+                extra = f"Accept: {wire.CONTENT_TYPE}\r\n"
+        request = (f"POST {path or self.path} HTTP/1.1\r\n"
+                   f"Host: {self.server_address[0]}:{self.server_address[1]}\r\n{extra}"
+                   f"Content-Length: {len(payload)}\r\n\r\n").encode('utf-8') + payload
+        for attempt in range(2):
+            reused = bool(self.pool)
+            sock = None
+            try:
+                sock = self.pool.pop() if reused else self._connect()
+                sock.sendall(request)
+                kode, body, keep_alive, content_type = self._read_response(sock)
+            except (OSError, ConnectionError) as e:
+                if sock: sock.close()
+                # koneksi dari pool mungkin sudah ditutup server, coba sekali lagi
+                if reused and attempt == 0: continue
+                print(f"Client Error: {e}")
+                return {"status": "ERROR", "message": str(e)}
+            if keep_alive: self._release(sock)
+            else: sock.close()
+            if kode == 421 and attempt == 0:
+                # server prefork: koneksi ini milik worker room lain, buka koneksi baru
+                self.close()
+                continue
+            if content_type.startswith(wire.CONTENT_TYPE):
+                self.binary_ok = True
+                try:
+                    return wire.decode(body)
+                except ValueError:
+                    return {"status": "ERROR", "message": "Invalid binary response"}
+            body_str = body.decode('utf-8', errors='ignore').strip()
+            if not body_str: return {"status": "ERROR", "message": "Empty JSON body"}
+            try:
+                return json.loads(body_str)
+            except ValueError:
+                return {"status": "ERROR", "message": body_str}
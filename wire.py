@@ -0,0 +1,436 @@
+# wire.py
+# Protokol biner opsional untuk POST /uno, dipilih lewat header HTTP:
+#   Content-Type: application/x-uno  -> body request berupa perintah biner
+#   Accept: application/x-uno        -> balasan dikirim biner alih-alih JSON
+# Panjang pesan utama diambil dari Content-Length, pesan bersarang (state di dalam batch,
+# hasil per aksi) diberi awalan panjang varint. Kartu dikirim sebagai id 1 byte (logic.CARD_IDS),
+# jadi tangan 7 kartu cukup 8 byte alih-alih daftar string seperti "yellow Wild Draw Four".
+import functools
+import re
+import struct
+from logic import CARD_NAMES, CARD_IDS, COLOR_NAMES, COLOR_IDS
+
+CONTENT_TYPE = "application/x-uno"
+HEADERS = b"Content-type:application/x-uno\r\n"
+
+_U8 = struct.Struct("!B")
+_U16 = struct.Struct("!H")
+_I32 = struct.Struct("!i")
+NO_CARD = 0xFF
+NO_COLOR = 0xFF
+NO_STRING = 0xFFFF
+
+def accepts(headers):
+    return CONTENT_TYPE in headers.get('accept', '')
+
+def is_binary(headers):
+    return headers.get('content-type', '').startswith(CONTENT_TYPE)
+
+class Reader:
+    __slots__ = ('data', 'pos')
+
+    def __init__(self, data):
+        self.data = data
+        self.pos = 0
+
+    def take(self, n):
+        end = self.pos + n
+        if end > len(self.data):
+            raise ValueError("pesan biner terpotong")
+        chunk = self.data[self.pos:end]
+        self.pos = end
+        return chunk
+
+    def u8(self):
+        return self.take(1)[0]
+
+    def u16(self):
+        return _U16.unpack(self.take(2))[0]
+
+    def i32(self):
+        return _I32.unpack(self.take(4))[0]
+
+    def string(self):
+        n = self.u16()
+        if n == NO_STRING:
+            return None
+        return self.take(n).decode('utf-8')
+
+    def done(self):
+        return self.pos >= len(self.data)
+
+def _string(value):
+    if value is None:
+        return _U16.pack(NO_STRING)
+    raw = value.encode('utf-8')
+    return _U16.pack(len(raw)) + raw
+
+STATUSES = ("OK", "ERROR", "NOT_MODIFIED")
+STATUS_IDS = {name: i for i, name in enumerate(STATUSES)}
+
+# jenis field; encode/decode memakai satu rantai if per jenis (tanpa panggilan fungsi per field)
+# karena pesan ini dibuat untuk setiap balasan state.
+#   PLAYER  : id pemain sebagai index ke player_statuses di pesan yang sama (1 byte), atau string
+#   MESSAGE : last_action_message sebagai nomor template + pemain / kartu di dalamnya
+INT, BOOL, STRING, CARD, CARDS, INDICES, STATUS, PLAYER_STATUSES, STRINGS, RESULTS, NESTED, PLAYER, MESSAGE = range(13)
+
+# tag 1 byte = posisi di tuple ini; field yang tidak ada di dict tidak dikirim.
+# bit FLAG pada tag: nilai True untuk BOOL, None untuk STRING / PLAYER (tanpa isi)
+FIELDS = (
+    ("status", STATUS),
+    ("version", INT),
+    ("delta", BOOL),
+    ("base_version", INT),
+    ("hand", CARDS),
+    ("hand_removed", INDICES),
+    ("hand_added", CARDS),
+    ("playable", INDICES),
+    ("top_card", CARD),
+    ("your_turn", BOOL),
+    ("current_turn", PLAYER),
+    ("winner", PLAYER),
+    ("last_action_message", MESSAGE),
+    ("player_statuses", PLAYER_STATUSES),
+    ("players_removed", STRINGS),
+    ("room", STRING),
+    ("message", STRING),
+    ("failed", INT),
+    ("results", RESULTS),
+    ("state", NESTED),
+)
+FIELD_TAGS = {name: (tag, kind) for tag, (name, kind) in enumerate(FIELDS)}
+FLAG = 0x80
+# jumlah kartu di tangan < 128, bit atas byte jumlah dipakai untuk status on_uno
+ON_UNO = 0x80
+NO_REF = 0xFF
+RAW_MESSAGE = 0xFF
+_card_id = CARD_IDS.__getitem__
+_card_name = CARD_NAMES.__getitem__
+
+# pesan logic.Game yang paling sering; "p" = pemain, "c" = nama kartu. pesan yang tidak cocok
+# (atau teksnya berubah di logic) tetap terkirim sebagai string biasa
+MESSAGES = (
+    ("{} telah bergabung.", "p"),
+    ("{} keluar dari permainan.", "p"),
+    ("{} menyatakan UNO!", "p"),
+    ("{} salah menyatakan UNO, +1 kartu!", "p"),
+    ("{} menantang {}! {} menarik 2 kartu.", "ppp"),
+    ("Tantangan {} pada {} gagal, +1 kartu!", "pp"),
+    ("{} memainkan {}.", "pc"),
+    ("🎉 {} MENANG! 🎉", "p"),
+    ("{} menarik kartu.", "p"),
+)
+_MESSAGE_PATTERNS = [re.compile("^" + "(.+?)".join(map(re.escape, template.split("{}"))) + "$", re.S)
+                     for template, slots in MESSAGES]
+
+def _put_varint(out, n):
+    while n >= 0x80:
+        out.append((n & 0x7F) | 0x80)
+        n >>= 7
+    out.append(n)
+
+def _get_varint(data, pos):
+    result = shift = 0
+    while True:
+        b = data[pos]
+        pos += 1
+        result |= (b & 0x7F) << shift
+        if not b & 0x80:
+            return result, pos
+        shift += 7
+
+def _put_text(out, value):
+    raw = value.encode('utf-8')
+    _put_varint(out, len(raw))
+    out += raw
+
+def _put_player(out, value, names):
+    index = names.get(value, NO_REF)
+    out.append(index)
+    if index == NO_REF:
+        _put_text(out, value)
+
+@functools.lru_cache(maxsize=256)
+def _message_bytes(message, names):
+    # pesan yang sama dikirim ke semua pemain di satu versi, jadi hasilnya di-cache
+    out = bytearray()
+    index = {name: i for i, name in enumerate(names[:NO_REF])}
+    for number, pattern in enumerate(_MESSAGE_PATTERNS):
+        match = pattern.match(message)
+        if match is None:
+            continue
+        args = match.groups()
+        slots = MESSAGES[number][1]
+        if any(kind == "c" and arg not in CARD_IDS for kind, arg in zip(slots, args)):
+            continue
+        out.append(number)
+        for kind, arg in zip(slots, args):
+            if kind == "c":
+                out.append(CARD_IDS[arg])
+            else:
+                _put_player(out, arg, index)
+        return bytes(out)
+    out.append(RAW_MESSAGE)
+    _put_text(out, message)
+    return bytes(out)
+
+def encode(result):
+    # dict balasan (state penuh, delta, hasil aksi, batch) -> bytes
+    out = bytearray()
+    names = None
+    for key, value in result.items():
+        field = FIELD_TAGS.get(key)
+        if field is None:
+            raise ValueError("field {} tidak punya encoding biner".format(key))
+        tag, kind = field
+        if kind == BOOL:
+            out.append(tag | FLAG if value else tag)
+            continue
+        if value is None and (kind == STRING or kind == PLAYER):
+            out.append(tag | FLAG)
+            continue
+        out.append(tag)
+        if kind == STRING:
+            _put_text(out, value)
+        elif kind == CARDS:
+            _put_varint(out, len(value))
+            out += bytes(map(_card_id, value))
+        elif kind == INDICES:
+            _put_varint(out, len(value))
+            out += bytes(value)
+        elif kind == INT:
+            # zigzag: angka negatif kecil tetap 1 byte
+            _put_varint(out, value * 2 if value >= 0 else -value * 2 - 1)
+        elif kind == CARD:
+            out.append(CARD_IDS[value] if value else NO_CARD)
+        elif kind == STATUS:
+            out.append(STATUS_IDS[value])
+        elif kind == PLAYER or kind == MESSAGE:
+            if names is None:
+                names = tuple(result.get("player_statuses", ()))
+            if kind == MESSAGE:
+                out += _message_bytes(value, names)
+            else:
+                _put_player(out, value, {name: i for i, name in enumerate(names[:NO_REF])})
+        elif kind == PLAYER_STATUSES:
+            _put_varint(out, len(value))
+            for pid, status in value.items():
+                _put_text(out, pid)
+                out.append(status["count"] | ON_UNO if status["on_uno"] else status["count"])
+        elif kind == STRINGS:
+            _put_varint(out, len(value))
+            for item in value:
+                _put_text(out, item)
+        elif kind == RESULTS:
+            _put_varint(out, len(value))
+            for item in value:
+                raw = encode(item)
+                _put_varint(out, len(raw))
+                out += raw
+        else:
+            raw = encode(value)
+            _put_varint(out, len(raw))
+            out += raw
+    return bytes(out)
+
+def decode(data):
+    # pesan rusak / terpotong selalu dilaporkan sebagai ValueError, apa pun titik gagalnya
+    try:
+        return _decode(data)
+    except (IndexError, KeyError, struct.error):
+        raise ValueError("pesan biner terpotong")
+
+def _get_player(data, pos):
+    # index ke player_statuses (diselesaikan setelah seluruh pesan dibaca) atau string
+    index = data[pos]
+    pos += 1
+    if index != NO_REF:
+        return index, pos
+    n, pos = _get_varint(data, pos)
+    if pos + n > len(data):
+        raise ValueError("pesan biner terpotong")
+    return data[pos:pos + n].decode('utf-8'), pos + n
+
+def _decode(data):
+    # posisi dibaca langsung dari bytes (tanpa objek Reader) agar decode state semurah mungkin;
+    # pesan yang terpotong terdeteksi di akhir karena posisi melewati panjang data
+    result = {}
+    # field PLAYER / MESSAGE yang merujuk ke player_statuses, diisi setelah semua field terbaca
+    refs = []
+    pos, end = 0, len(data)
+    while pos < end:
+        tag = data[pos]
+        flag = tag & FLAG
+        tag &= ~FLAG
+        if tag >= len(FIELDS):
+            raise ValueError("tag field {} tidak dikenal".format(tag))
+        name, kind = FIELDS[tag]
+        pos += 1
+        if kind == BOOL:
+            result[name] = flag != 0
+        elif flag:
+            result[name] = None
+        elif kind == STRING:
+            n = data[pos]
+            if n & 0x80:
+                n, pos = _get_varint(data, pos)
+            else:
+                pos += 1
+            result[name] = data[pos:pos + n].decode('utf-8')
+            pos += n
+        elif kind == CARDS:
+            n, pos = _get_varint(data, pos)
+            result[name] = list(map(_card_name, data[pos:pos + n]))
+            pos += n
+        elif kind == INDICES:
+            n, pos = _get_varint(data, pos)
+            result[name] = list(data[pos:pos + n])
+            pos += n
+        elif kind == INT:
+            n, pos = _get_varint(data, pos)
+            result[name] = -((n + 1) >> 1) if n & 1 else n >> 1
+        elif kind == CARD:
+            card = data[pos]
+            result[name] = "" if card == NO_CARD else CARD_NAMES[card]
+            pos += 1
+        elif kind == STATUS:
+            result[name] = STATUSES[data[pos]]
+            pos += 1
+        elif kind == PLAYER:
+            result[name], pos = _get_player(data, pos)
+            refs.append(name)
+        elif kind == MESSAGE:
+            number = data[pos]
+            pos += 1
+            if number == RAW_MESSAGE:
+                n, pos = _get_varint(data, pos)
+                result[name] = data[pos:pos + n].decode('utf-8')
+                pos += n
+                continue
+            args = []
+            for slot in MESSAGES[number][1]:
+                if slot == "c":
+                    args.append(CARD_NAMES[data[pos]])
+                    pos += 1
+                else:
+                    arg, pos = _get_player(data, pos)
+                    args.append(arg)
+            result[name] = (number, args)
+            refs.append(name)
+        elif kind == PLAYER_STATUSES:
+            statuses = {}
+            count, pos = _get_varint(data, pos)
+            for _ in range(count):
+                n = data[pos]
+                if n & 0x80:
+                    n, pos = _get_varint(data, pos)
+                else:
+                    pos += 1
+                pid = data[pos:pos + n].decode('utf-8')
+                pos += n
+                packed = data[pos]
+                statuses[pid] = {"count": packed & ~ON_UNO, "on_uno": packed & ON_UNO != 0}
+                pos += 1
+            result[name] = statuses
+        else:
+            reader = Reader(data)
+            reader.pos = pos
+            if kind == STRINGS:
+                result[name] = [reader.take(_reader_varint(reader)).decode('utf-8')
+                                for _ in range(_reader_varint(reader))]
+            elif kind == RESULTS:
+                result[name] = [_decode(reader.take(_reader_varint(reader))) for _ in range(_reader_varint(reader))]
+            else:
+                result[name] = _decode(reader.take(_reader_varint(reader)))
+            pos = reader.pos
+    if pos != end:
+        raise ValueError("pesan biner terpotong")
+    if refs:
+        names = list(result.get("player_statuses", ()))
+        player = lambda ref: names[ref] if type(ref) is int else ref
+        for name in refs:
+            value = result[name]
+            if name == "last_action_message":
+                number, args = value
+                result[name] = MESSAGES[number][0].format(*[
+                    player(arg) if slot == "p" else arg for slot, arg in zip(MESSAGES[number][1], args)])
+            else:
+                result[name] = player(value)
+    return result
+
+def _reader_varint(reader):
+    n, reader.pos = _get_varint(reader.data, reader.pos)
+    return n
+
+
+# ---- perintah ---------------------------------------------------------------
+# op 1 byte + pemain + argumen; decode_command menghasilkan baris teks yang sama dengan
+# protokol lama sehingga HttpServer tetap memakai satu dispatcher untuk kedua format
+
+COMMANDS = ("state", "join", "wait", "play", "draw", "uno", "callout", "batch")
+COMMAND_IDS = {name: i for i, name in enumerate(COMMANDS)}
+
+def _enc_version(parts, i):
+    return _I32.pack(int(parts[i]) if len(parts) > i else -1)
+
+def _enc_action(op, args):
+    # argumen aksi tanpa nama pemain, dipakai perintah tunggal maupun isi batch
+    out = [_U8.pack(COMMAND_IDS[op])]
+    if op == "play":
+        color = args[1] if len(args) > 1 else None
+        out.append(bytes((int(args[0]), COLOR_IDS[color] if color else NO_COLOR)))
+    elif op == "callout":
+        out.append(_string(args[0]))
+    return b"".join(out)
+
+def encode_command(command_line):
+    # "play p1 3 red" -> bytes; batch memakai baris/";" seperti protokol teks
+    lines = [line.split() for line in command_line.replace(";", "\n").splitlines() if line.strip()]
+    parts = lines[0]
+    op, player = parts[0], parts[1]
+    if op in ("state", "join"):
+        return _U8.pack(COMMAND_IDS[op]) + _string(player) + _enc_version(parts, 2)
+    if op == "wait":
+        timeout = float(parts[3]) if len(parts) > 3 else NO_STRING / 10
+        return _U8.pack(COMMAND_IDS[op]) + _string(player) + _enc_version(parts, 2) + _U16.pack(int(timeout * 10))
+    if op == "batch":
+        actions = [_enc_action(line[0], line[1:]) for line in lines[1:]]
+        return (_U8.pack(COMMAND_IDS[op]) + _string(player) + _enc_version(parts, 2) +
+                _U16.pack(len(actions)) + b"".join(actions))
+    action = _enc_action(op, parts[2:])
+    return action[:1] + _string(player) + action[1:]
+
+def _dec_action(reader, op, player=None):
+    words = [op] if player is None else [op, player]
+    if op == "play":
+        index, color = reader.take(2)
+        words.append(str(index))
+        if color != NO_COLOR:
+            words.append(COLOR_NAMES[color])
+    elif op == "callout":
+        words.append(reader.string())
+    return " ".join(words)
+
+def _dec_op(reader):
+    op = reader.u8()
+    if op >= len(COMMANDS):
+        raise ValueError("perintah {} tidak dikenal".format(op))
+    return COMMANDS[op]
+
+def decode_command(data):
+    reader = Reader(data)
+    op = _dec_op(reader)
+    player = reader.string()
+    if op in ("state", "join", "wait", "batch"):
+        version = reader.i32()
+        head = "{} {}".format(op, player) if version < 0 else "{} {} {}".format(op, player, version)
+        if op == "wait":
+            timeout = reader.u16()
+            if version < 0:
+                head += " -1"
+            if timeout != NO_STRING:
+                head += " {}".format(timeout / 10)
+        elif op == "batch":
+            return "\n".join([head] + [_dec_action(reader, _dec_op(reader)) for _ in range(reader.u16())])
+        return head
+    return _dec_action(reader, op, player)